@@ -3,6 +3,10 @@ ASGI config for campusmedia_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server, e.g. ``uvicorn campusmedia_backend.asgi:application``.
+The async users API under /api/async/users/ runs natively on the event loop;
+the synchronous DRF views keep working and are run in a thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,88 @@
+"""
+MySQL backend with a per-process connection pool.
+
+    DATABASES = {'default': {
+        'ENGINE': 'campusmedia_backend.mysql_pool',
+        ...
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': {'max_size': 10, 'timeout': 10, 'max_idle': 300, 'max_lifetime': 3600}},
+    }}
+
+Django still "closes" the connection at the end of every request; this
+backend hands it back to the pool instead, so the next request skips the
+TCP handshake and authentication. Like Django's PostgreSQL pool it needs
+CONN_MAX_AGE = 0. With CONN_HEALTH_CHECKS, idle connections are pinged
+before they're handed out. ``'pool': True`` uses the defaults.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+from django.db.backends.mysql import base as mysql
+from django.db.utils import NO_DB_ALIAS
+
+from .pool import ConnectionPool, PoolTimeout, pool_for
+
+
+DEFAULT_POOL_OPTIONS = {'max_size': 10, 'timeout': 10, 'max_idle': 300, 'max_lifetime': 3600}
+
+
+def _ping(connection):
+    connection.ping()
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured("Pooling doesn't support persistent connections (CONN_MAX_AGE).")
+        params = self.get_connection_params()
+
+        def create():
+            return ConnectionPool(
+                connect=lambda: mysql.DatabaseWrapper.get_new_connection(self, params),
+                check=_ping if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                **{**DEFAULT_POOL_OPTIONS, **(options if isinstance(options, dict) else {})},
+            )
+
+        return pool_for(self.alias, repr(sorted(params.items())), create)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)  # ours, not a MySQLdb.connect() argument
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            return pool.acquire()
+        except PoolTimeout as e:
+            raise OperationalError(str(e)) from e
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        connection = self.connection
+        discard = self.errors_occurred and not self.is_usable()
+        if not discard and (self.in_atomic_block or not self.autocommit):
+            # Never hand over an open transaction; the next user expects a
+            # fresh session in autocommit mode
+            try:
+                connection.rollback()
+                connection.autocommit(True)
+            except mysql.Database.Error:
+                discard = True
+        # Released even when closed inside atomic(), so it can't be reused from here
+        self.connection = None
+        pool.release(connection, discard=discard)
+
+    def close_if_health_check_failed(self):
+        if self.pool is not None:
+            return  # the pool checks connections before handing them out
+        return super().close_if_health_check_failed()
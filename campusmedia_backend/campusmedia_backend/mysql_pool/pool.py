@@ -0,0 +1,226 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+_pools = {}  # alias -> (pid, key, ConnectionPool)
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's timeout"""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created_at', 'returned_at')
+
+    def __init__(self, connection, created_at):
+        self.connection = connection
+        self.created_at = created_at
+        self.returned_at = created_at
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of DB-API connections for one process.
+
+    ``connect()`` opens a new connection; ``check(connection)`` raises if a
+    connection is no longer usable and is run before an idle connection is
+    handed out (pass None to skip it). At most ``max_size`` connections are
+    open at once; callers beyond that wait up to ``timeout`` seconds for one
+    to be released, then get PoolTimeout. Idle connections are closed after
+    ``max_idle`` seconds and all connections after ``max_lifetime``, so the
+    server's wait_timeout never cuts one off while it sits in the pool.
+
+    Free connections are reused most-recently-released first, which keeps
+    the busy set small and lets the rest age out when load drops.
+    """
+
+    def __init__(self, connect, check=None, max_size=10, timeout=10, max_idle=300, max_lifetime=3600):
+        self._connect = connect
+        self._check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._idle = deque()  # _Entry, oldest release on the left
+        self._in_use = {}  # id(connection) -> _Entry
+        self._opening = 0  # slots claimed by connects in progress
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'acquired': 0, 'waits': 0, 'wait_seconds': 0.0, 'timeouts': 0,
+            'opened': 0, 'closed': 0, 'failed_checks': 0,
+        }
+
+    @property
+    def size(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def acquire(self):
+        """Return a healthy connection, opening one if there is room"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                expired = self._take_expired()
+                entry = self._idle.pop() if self._idle else None
+                if entry is None and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        self._record_wait(started, waited)
+                        raise PoolTimeout(
+                            f'No database connection free after {self.timeout}s ({self.max_size} in use)')
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    continue
+                if entry is None:
+                    self._opening += 1
+                else:
+                    self._in_use[id(entry.connection)] = entry
+
+            for stale in expired:
+                self._close(stale.connection)
+            if entry is None:
+                entry = self._open()
+            elif not self._healthy(entry):
+                continue
+            with self._cond:
+                self._stats['acquired'] += 1
+                self._record_wait(started, waited)
+            return entry.connection
+
+    def release(self, connection, discard=False):
+        """Hand a connection back, or close it if ``discard`` or past its lifetime"""
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return  # not ours, e.g. opened before the pool was reset
+            now = time.monotonic()
+            if discard or now - entry.created_at >= self.max_lifetime:
+                self._stats['closed'] += 1
+            else:
+                entry.returned_at = now
+                self._idle.append(entry)
+                entry = None
+            self._cond.notify()
+        if entry is not None:
+            self._close(entry.connection)
+
+    def close_all(self):
+        """Close the idle connections; ones in use are closed when released"""
+        with self._cond:
+            entries, self._idle = list(self._idle), deque()
+            self._stats['closed'] += len(entries)
+            self.max_lifetime = 0
+            self._cond.notify_all()
+        for entry in entries:
+            self._close(entry.connection)
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                size=self.size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                waiting=self._waiting,
+                max_size=self.max_size,
+            )
+
+    def _open(self):
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        entry = _Entry(connection, time.monotonic())
+        with self._cond:
+            self._opening -= 1
+            self._in_use[id(connection)] = entry
+            self._stats['opened'] += 1
+        return entry
+
+    def _healthy(self, entry):
+        if self._check is None:
+            return True
+        try:
+            self._check(entry.connection)
+            return True
+        except Exception as e:
+            logger.info('Dropping a pooled database connection that failed its check: %s', e)
+        with self._cond:
+            self._in_use.pop(id(entry.connection), None)
+            self._stats['failed_checks'] += 1
+            self._stats['closed'] += 1
+            self._cond.notify()
+        self._close(entry.connection)
+        return False
+
+    def _take_expired(self):
+        # Called with the lock held. Idle entries are ordered by release
+        # time, so idle expiry stops at the first fresh one; lifetime expiry
+        # has to look at them all, but the idle list is short.
+        now = time.monotonic()
+        expired = []
+        while self._idle and now - self._idle[0].returned_at >= self.max_idle:
+            expired.append(self._idle.popleft())
+        if any(now - entry.created_at >= self.max_lifetime for entry in self._idle):
+            keep = deque()
+            for entry in self._idle:
+                (expired if now - entry.created_at >= self.max_lifetime else keep).append(entry)
+            self._idle = keep
+        self._stats['closed'] += len(expired)
+        return expired
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass  # already broken; nothing left to release
+
+    def _record_wait(self, started, waited):
+        if waited:
+            self._stats['waits'] += 1
+            self._stats['wait_seconds'] += time.monotonic() - started
+
+
+def pool_for(alias, key, create):
+    """
+    This process's pool for ``alias``, made with ``create()`` on first use.
+    A forked worker (e.g. gunicorn --preload) must not share its parent's
+    sockets, so the pool is rebuilt when the pid changes; it is also rebuilt
+    when ``key`` (the connection parameters) changes, as when the test runner
+    switches to the test database.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        owner, current_key, pool = _pools.get(alias, (None, None, None))
+        if owner == pid and current_key == key:
+            return pool
+        replaced = pool if owner == pid else None
+        pool = create()
+        _pools[alias] = (pid, key, pool)
+    if replaced is not None:
+        replaced.close_all()
+    return pool
+
+
+def pool_stats():
+    """{alias: stats} for the pools this process has opened"""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [(alias, pool) for alias, (owner, _, pool) in _pools.items() if owner == pid]
+    return {alias: pool.stats() for alias, pool in pools}
@@ -44,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'users.metrics.MetricsMiddleware',
+    'users.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -77,21 +79,63 @@ WSGI_APPLICATION = 'campusmedia_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections come from a per-process pool of up to DB_POOL_SIZE (0 turns
+# pooling off); a request waits up to DB_POOL_TIMEOUT seconds for a free one.
+# Keep DB_POOL_SIZE x worker processes under MySQL's max_connections.
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+
 DATABASES = {
     'default': {   
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'campusmedia_backend.mysql_pool',
         'NAME': 'campusmedia_db',
         'USER': 'root',
         'PASSWORD': 'root123',  # MySQL password
         'HOST': 'localhost',
         'PORT': '3306',
+        'CONN_MAX_AGE': 0,  # required by the pool; "closing" returns the connection to it
+        'CONN_HEALTH_CHECKS': True,  # ping idle pooled connections before reuse
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
+            'pool': {'max_size': DB_POOL_SIZE, 'timeout': DB_POOL_TIMEOUT} if DB_POOL_SIZE else False,
         },
     }
 }
 
+# Read replicas, as a comma-separated list of host or host:port. GET requests
+# read from a healthy replica; everything else, and any client that wrote in
+# the last REPLICA_PIN_SECONDS, uses the primary. The pins live in the cache
+# below, so share it between worker processes when replicas are on.
+DATABASE_REPLICAS = []
+for number, address in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]), start=1):
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['users.replicas.ReplicaRouter']
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5, cast=float)  # seconds behind before a replica is skipped
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+REPLICA_HEALTH_INTERVAL = config('REPLICA_HEALTH_INTERVAL', default=5, cast=float)  # seconds between checks
+
+
+# Cache
+# Token lookups and other hot reads are fronted by this cache. Point it at a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache) when
+# running more than one worker process.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='campusmedia'),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -177,4 +221,45 @@ REST_FRAMEWORK = {
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.TokenAuthentication',
+    ],
 }
+
+# Access tokens issued at login
+AUTH_TOKEN_TTL = config('AUTH_TOKEN_TTL', default=60 * 60 * 24 * 7, cast=int)  # seconds
+AUTH_TOKEN_CACHE_TIMEOUT = config('AUTH_TOKEN_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+
+# Failed-login throttling. Use users.throttling.CacheThrottleStore to share
+# counts between worker processes through the cache configured above.
+LOGIN_THROTTLE = {
+    'STORE': config('LOGIN_THROTTLE_STORE', default='users.throttling.InMemoryThrottleStore'),
+    'ACCOUNT_LIMIT': 5,     # failed attempts per account...
+    'ACCOUNT_WINDOW': 300,  # ...per 5 minutes
+    'IP_LIMIT': 50,         # failed attempts per client IP...
+    'IP_WINDOW': 300,       # ...per 5 minutes
+    'TRUST_X_FORWARDED_FOR': config('TRUST_X_FORWARDED_FOR', default=False, cast=bool),
+}
+
+# Thread pool that runs PBKDF2 for the async (ASGI) views and the bulk
+# provisioning endpoint, and how many hash jobs may be queued before new
+# logins/registrations get a 503
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=4, cast=int)
+PASSWORD_HASH_MAX_PENDING = config('PASSWORD_HASH_MAX_PENDING', default=256, cast=int)
+
+# Worker processes that hash passwords in the provision_users command
+# (0 = one per CPU core); the API endpoint uses the thread pool above
+PASSWORD_HASH_PROCESSES = config('PASSWORD_HASH_PROCESSES', default=0, cast=int)
+
+# Academic calendar: the month the academic year starts in, and how many
+# equal terms it is split into (must divide 12)
+ACADEMIC_YEAR_START_MONTH = config('ACADEMIC_YEAR_START_MONTH', default=6, cast=int)
+TERMS_PER_YEAR = config('TERMS_PER_YEAR', default=2, cast=int)
+
+# Per-route request metrics, exposed for Prometheus at /metrics. With several
+# worker processes, point METRICS_DIR at a directory they all share (cleared
+# on deploy); each worker writes its numbers there and /metrics adds them up.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
@@ -17,7 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from users.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
+    path('api/async/users/', include('users.async_urls')),
+    path('api/', include('users.dashboard_urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -66,7 +66,7 @@ def test_get_all_users():
     print("Testing Get All Users API")
     print("=" * 60)
     
-    response = requests.get(f"{BASE_URL}/")
+    response = requests.get(f"{BASE_URL}/", params={"include_count": "true"})
     print(f"\nStatus Code: {response.status_code}")
     data = response.json()
     print(f"Total Users: {data['count']}")
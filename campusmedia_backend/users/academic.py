@@ -0,0 +1,48 @@
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def _start_month():
+    return getattr(settings, 'ACADEMIC_YEAR_START_MONTH', 6)
+
+
+def _terms_per_year():
+    return getattr(settings, 'TERMS_PER_YEAR', 2)
+
+
+def academic_year_start(date):
+    """The calendar year in which the academic year containing ``date`` began"""
+    return date.year if date.month >= _start_month() else date.year - 1
+
+
+def academic_year_label(start_year):
+    """e.g. 2025 -> '2025-26'"""
+    return f'{start_year}-{str(start_year + 1)[-2:]}'
+
+
+def academic_year_bounds(start_year):
+    """First and last day of an academic year"""
+    first = datetime.date(start_year, _start_month(), 1)
+    next_first = datetime.date(start_year + 1, _start_month(), 1)
+    return first, next_first - datetime.timedelta(days=1)
+
+
+def term_for_month(year, month):
+    """
+    Term label for a calendar month, e.g. '2025-26/T1'. Terms split the
+    academic year into equal runs of whole months.
+    """
+    start_year = year if month >= _start_month() else year - 1
+    months_in = (month - _start_month()) % 12
+    term = months_in // (12 // _terms_per_year()) + 1
+    return f'{academic_year_label(start_year)}/T{term}'
+
+
+def term_for_date(date):
+    return term_for_month(date.year, date.month)
+
+
+def current_term():
+    return term_for_date(timezone.localdate())
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import User, Class, ClassEnrollment, Attendance, Grade, Announcement
+from .models import (
+    User, Class, ClassEnrollment, Attendance, Grade, Announcement,
+    ArchivedAcademicYear, AttendanceArchive, GradeArchive,
+)
+from .search import full_text_filter, search_terms
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -61,10 +65,50 @@ class GradeAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at', 'grade_letter')
 
 
+@admin.register(ArchivedAcademicYear)
+class ArchivedAcademicYearAdmin(admin.ModelAdmin):
+    list_display = ('label', 'status', 'attendance_rows', 'grade_rows', 'started_at', 'completed_at')
+    ordering = ('-start_year',)
+    readonly_fields = ('start_year', 'label', 'status', 'attendance_rows', 'grade_rows', 'started_at', 'completed_at')
+
+
+class ArchiveAdmin(admin.ModelAdmin):
+    """Archived rows are history: browsable, not editable"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(ArchiveAdmin):
+    list_display = ('student', 'class_attended', 'date', 'status', 'academic_year')
+    list_filter = ('academic_year', 'status')
+    search_fields = ('student__first_name', 'student__last_name', 'class_attended__class_name')
+    ordering = ('-date',)
+
+
+@admin.register(GradeArchive)
+class GradeArchiveAdmin(ArchiveAdmin):
+    list_display = ('student', 'class_graded', 'assignment_name', 'score', 'grade_letter', 'academic_year')
+    list_filter = ('academic_year', 'grade_letter')
+    search_fields = ('student__first_name', 'student__last_name', 'class_graded__class_name', 'assignment_name')
+    ordering = ('-created_at',)
+
+
 @admin.register(Announcement)
 class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_by', 'target_role', 'is_active', 'created_at')
     list_filter = ('is_active', 'target_role', 'created_at', 'created_by')
-    search_fields = ('title', 'content', 'created_by__first_name', 'created_by__last_name')
+    search_fields = ('created_by__first_name', 'created_by__last_name')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Title/content are matched through the full-text index rather than icontains scans
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_terms(search_term):
+            return results, may_have_duplicates
+        return results | full_text_filter(queryset, search_term), may_have_duplicates
@@ -0,0 +1,85 @@
+import math
+import statistics
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from .models import Grade
+from .replicas import read_from_primary
+
+
+GRADE_STATS_CACHE_PREFIX = 'grade-stats:'
+GRADE_STATS_CACHE_TIMEOUT = 60 * 60  # seconds; saves invalidate sooner
+PERCENTILES = (10, 25, 50, 75, 90)
+LETTERS = [letter for letter, _ in Grade.GRADE_CHOICES]
+
+
+def percentile(sorted_scores, pct):
+    """Linear-interpolated percentile of an already sorted list (numpy's default method)"""
+    if not sorted_scores:
+        return None
+    position = (len(sorted_scores) - 1) * pct / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return float(sorted_scores[lower])
+    weight = position - lower
+    return sorted_scores[lower] * (1 - weight) + sorted_scores[upper] * weight
+
+
+def score_stats(scores, letters):
+    """Summary statistics for one column of scores and the matching letters"""
+    if not scores:
+        return {'count': 0}
+    ordered = sorted(scores)
+    histogram = Counter(letters)
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered), 2),
+        'median': float(statistics.median(ordered)),
+        'std_dev': round(statistics.pstdev(ordered), 2),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'percentiles': {f'p{pct}': round(percentile(ordered, pct), 2) for pct in PERCENTILES},
+        'letter_histogram': {letter: histogram.get(letter, 0) for letter in LETTERS},
+    }
+
+
+def compute_class_grade_stats(class_id):
+    """
+    Overall and per-assignment statistics for one class, from a single
+    query that pulls just the (assignment, score, letter) columns.
+    """
+    rows = Grade.objects.filter(class_graded_id=class_id).values_list('assignment_name', 'score', 'grade_letter').order_by()
+    scores, letters = [], []
+    by_assignment = defaultdict(lambda: ([], []))
+    for assignment_name, score, letter in rows:
+        scores.append(score)
+        letters.append(letter)
+        assignment_scores, assignment_letters = by_assignment[assignment_name]
+        assignment_scores.append(score)
+        assignment_letters.append(letter)
+
+    return {
+        'overall': score_stats(scores, letters),
+        'assignments': {
+            name: score_stats(assignment_scores, assignment_letters)
+            for name, (assignment_scores, assignment_letters) in sorted(by_assignment.items())
+        },
+    }
+
+
+def get_class_grade_stats(class_id):
+    """Cached statistics for a class; recomputed (on the primary) only after its grades change"""
+    key = f'{GRADE_STATS_CACHE_PREFIX}{class_id}'
+    stats = cache.get(key)
+    if stats is None:
+        with read_from_primary():
+            stats = compute_class_grade_stats(class_id)
+        cache.set(key, stats, timeout=GRADE_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_class_grade_stats(*class_ids):
+    """Drop cached statistics after grades in these classes change"""
+    cache.delete_many([f'{GRADE_STATS_CACHE_PREFIX}{class_id}' for class_id in class_ids])
@@ -0,0 +1,72 @@
+import datetime
+
+from django.db import connection
+from django.utils import timezone
+
+from .academic import academic_year_bounds, academic_year_start
+from .models import ArchivedAcademicYear, Attendance, AttendanceArchive, Grade, GradeArchive
+
+
+# Archivable resource -> (hot model, archive model, field dating a row)
+ARCHIVES = {
+    'attendance': (Attendance, AttendanceArchive, 'date'),
+    'grades': (Grade, GradeArchive, 'created_at'),
+}
+
+
+def _local_midnight(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def year_lookups(date_field, start_year):
+    """
+    Filter kwargs selecting the rows of one academic year. Datetimes are
+    compared against local midnights, so this agrees with ``__date`` lookups.
+    """
+    first, last = academic_year_bounds(start_year)
+    if date_field == 'date':
+        return {'date__gte': first, 'date__lte': last}
+    return {
+        f'{date_field}__gte': _local_midnight(first),
+        f'{date_field}__lt': _local_midnight(last + datetime.timedelta(days=1)),
+    }
+
+
+def is_closed(start_year, today=None):
+    """Whether the academic year that began in ``start_year`` is over"""
+    return academic_year_bounds(start_year)[1] < (today or timezone.localdate())
+
+
+def move_rows(model, archive, pks, label):
+    """
+    Copy rows ``pks`` of ``model`` into ``archive`` tagged with academic year
+    ``label``, then delete them; call inside a transaction. Plain SQL, since
+    deleting through the ORM would fire the signals that take rows back out
+    of the attendance rollups, and past terms' rollups have to stay.
+    Returns the number of rows moved.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+    placeholders = ', '.join(['%s'] * len(pks))
+    source = quote(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(archive._meta.db_table)} ({columns}, {quote("academic_year")}) '
+            f'SELECT {columns}, %s FROM {source} WHERE {quote("id")} IN ({placeholders})',
+            [label, *pks],
+        )
+        cursor.execute(f'DELETE FROM {source} WHERE {quote("id")} IN ({placeholders})', pks)
+        return cursor.rowcount
+
+
+def archived_years(date_from=None, date_to=None):
+    """
+    (start year, status) of the archived or partly archived academic years
+    that overlap ``date_from``..``date_to``; either end may be open.
+    """
+    years = ArchivedAcademicYear.objects.order_by('start_year')
+    if date_from is not None:
+        years = years.filter(start_year__gte=academic_year_start(date_from))
+    if date_to is not None:
+        years = years.filter(start_year__lte=academic_year_start(date_to))
+    return list(years.values_list('start_year', 'status'))
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('register/', async_views.register_user, name='async-register'),
+    path('login/', async_views.login_user, name='async-login'),
+    path('', async_views.get_all_users, name='async-users-list'),
+    path('<int:user_id>/', async_views.get_user, name='async-user-detail'),
+    path('announcements/', async_views.get_announcements, name='async-announcements-list'),
+]
@@ -0,0 +1,237 @@
+"""
+Async variants of the users API, served under ASGI at /api/async/users/.
+
+Reads go through the async ORM and password hashing/verification runs on a
+bounded thread pool (see users.hashing), so a single worker process can hold
+many concurrent connections without a thread per request. Request and
+response bodies match the synchronous DRF views in users.views.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+
+from .models import User
+from .serializers import UserSerializer, UserResponseSerializer
+from .authentication import get_token_key, issue_token, resolve_token
+from .feed import get_announcement_feed
+from .filters import filter_users, parse_bool
+from .hashing import PasswordQueueFull, run_password_task
+from .pagination import InvalidCursor, akeyset_page, approximate_count, get_page_size
+from .throttling import get_client_ip, get_login_throttle
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _server_busy():
+    return JsonResponse({
+        'success': False,
+        'message': 'Server busy, please try again'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@csrf_exempt
+@require_POST
+async def register_user(request):
+    """
+    Register a new user
+    POST /api/async/users/register/
+    """
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid JSON body'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = UserSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid data',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    validated_data = dict(serializer.validated_data)
+    try:
+        validated_data['password'] = await run_password_task(make_password, validated_data['password'])
+    except PasswordQueueFull:
+        return _server_busy()
+
+    user = User(**validated_data)
+    try:
+        await sync_to_async(user.save)(hash_password=False)
+    except IntegrityError as e:
+        if 'email' in str(e):
+            message = 'Email already registered'
+        elif 'register_number' in str(e):
+            message = 'Register number already exists'
+        else:
+            message = 'Registration failed'
+        return JsonResponse({
+            'success': False,
+            'message': message
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return JsonResponse({
+        'success': True,
+        'message': 'User registered successfully',
+        'user': UserResponseSerializer(user).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_POST
+async def login_user(request):
+    """
+    Login user
+    POST /api/async/users/login/
+    """
+    data = _json_body(request) or {}
+    email = data.get('email')
+    password = data.get('password')
+    role = data.get('role')
+
+    throttle = get_login_throttle()
+    account = str(email or '').strip().lower()
+    client_ip = get_client_ip(request)
+    retry_after = throttle.check(account, client_ip)
+    if retry_after is not None:
+        response = JsonResponse({
+            'success': False,
+            'message': 'Too many failed login attempts. Please try again later.'
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    error = None
+    user = None
+    if not email or not password or not role:
+        error = 'Email, password, and role are required'
+    else:
+        user = await User.objects.filter(email=email, role=role).afirst()
+        try:
+            if user is None or not await run_password_task(user.check_password, password):
+                error = 'Invalid credentials'
+            elif not user.is_active:
+                error = 'User account is disabled'
+        except PasswordQueueFull:
+            return _server_busy()
+
+    throttle.record(account, client_ip, success=error is None)
+    if error is not None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid credentials',
+            'errors': {'non_field_errors': [error]}
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    token, expires_at = await sync_to_async(issue_token)(user)
+    return JsonResponse({
+        'success': True,
+        'message': 'Login successful',
+        'token': token,
+        'expires_at': expires_at,
+        'user': UserResponseSerializer(user).data
+    }, status=status.HTTP_200_OK)
+
+
+@require_GET
+async def get_all_users(request):
+    """
+    Get users, one page at a time
+    GET /api/async/users/?page_size=50&cursor=<next_cursor>&role=Student&is_active=true&include_count=true
+    """
+    try:
+        users = filter_users(User.objects.all(), request.GET)
+        page, next_cursor = await akeyset_page(
+            users,
+            request.GET.get('cursor'),
+            get_page_size(request),
+            salt='users.list',
+        )
+    except (ValueError, InvalidCursor) as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {
+        'success': True,
+        'page_count': len(page),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'users': UserResponseSerializer(page, many=True).data
+    }
+    if parse_bool(request.GET.get('include_count')):
+        data['count'] = await sync_to_async(approximate_count)(users)
+    return JsonResponse(data, status=status.HTTP_200_OK)
+
+
+@require_GET
+async def get_user(request, user_id):
+    """
+    Get a specific user by ID
+    GET /api/async/users/<id>/
+    """
+    user = await User.objects.filter(id=user_id).afirst()
+    if user is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'User not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return JsonResponse({
+        'success': True,
+        'user': UserResponseSerializer(user).data
+    }, status=status.HTTP_200_OK)
+
+
+@require_GET
+async def get_announcements(request):
+    """
+    Get announcements for the caller's role plus global ones, newest first
+    GET /api/async/users/announcements/?role=Student&page_size=20&cursor=<next_cursor>
+    """
+    key = get_token_key(request)
+    principal = await sync_to_async(resolve_token)(key) if key else None
+    role = principal.role if principal is not None else request.GET.get('role')
+    if role and role not in dict(User.ROLE_CHOICES):
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid role'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        feed = await sync_to_async(get_announcement_feed)(
+            role,
+            request.GET.get('cursor'),
+            get_page_size(request, default=20, maximum=100),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    not_modified = get_conditional_response(request, etag=feed['etag'], last_modified=feed['last_modified'])
+    if not_modified is not None:
+        return not_modified
+
+    response = JsonResponse(feed['data'], status=status.HTTP_200_OK)
+    response['ETag'] = feed['etag']
+    response['Last-Modified'] = http_date(feed['last_modified'])
+    patch_cache_control(response, no_cache=True, private=principal is not None)
+    return response
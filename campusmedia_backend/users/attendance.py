@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.db import connection, transaction
+
+from .models import Attendance, Class, ClassEnrollment
+from .rollups import apply_rollup_deltas, rollup_deltas
+
+
+# Single-letter codes accepted alongside the full status names
+STATUS_CODES = {'P': 'Present', 'A': 'Absent', 'L': 'Late', 'E': 'Excused'}
+UPSERT_BATCH_SIZE = 500
+
+
+class AttendanceError(ValueError):
+    """Raised when a roll call does not match the class roster"""
+
+
+def parse_status(value):
+    """Map 'P'/'present'/'Present' etc. to the stored status, or None if unknown"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.upper() in STATUS_CODES:
+        return STATUS_CODES[value.upper()]
+    value = value.capitalize()
+    return value if value in STATUS_CODES.values() else None
+
+
+def resolve_roll_call(enrolled_ids, statuses, default_status=None):
+    """
+    Turn a compact {student_id: status} map into a status for every enrolled
+    student. Students left out get ``default_status``; without a default the
+    map must cover the whole roster. Raises AttendanceError on any mismatch.
+    """
+    resolved = {}
+    for student_id, value in (statuses or {}).items():
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            raise AttendanceError(f'Invalid student id: {student_id}')
+        status = parse_status(value)
+        if status is None:
+            raise AttendanceError(f'Invalid status for student {student_id}: {value}')
+        resolved[student_id] = status
+
+    not_enrolled = set(resolved) - enrolled_ids
+    if not_enrolled:
+        raise AttendanceError(f'Students not enrolled in this class: {sorted(not_enrolled)}')
+
+    missing = enrolled_ids - set(resolved)
+    if missing:
+        if default_status is None:
+            raise AttendanceError(f'No status given for enrolled students: {sorted(missing)}')
+        for student_id in missing:
+            resolved[student_id] = default_status
+    return resolved
+
+
+def upsert_attendance(rows):
+    """
+    Insert or overwrite Attendance rows on (student, class_attended, date)
+    with a batched INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE.
+    """
+    options = {
+        'update_conflicts': True,
+        'update_fields': ['status', 'marked_by', 'remarks'],
+        'batch_size': UPSERT_BATCH_SIZE,
+    }
+    # MySQL's ON DUPLICATE KEY UPDATE can't name the conflicting key
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['student', 'class_attended', 'date']
+    Attendance.objects.bulk_create(rows, **options)
+
+
+def mark_class_attendance(class_obj, date, statuses, marked_by_id, default_status=None, remarks=None):
+    """
+    Record a whole roll call for ``class_obj`` on ``date`` in one transaction.
+    Re-marking the same class and date overwrites the earlier statuses.
+    Returns a Counter of how many students got each status.
+    """
+    enrolled_ids = set(
+        ClassEnrollment.objects.filter(class_enrolled=class_obj).values_list('student_id', flat=True)
+    )
+    resolved = resolve_roll_call(enrolled_ids, statuses, default_status)
+    rows = [
+        Attendance(
+            student_id=student_id,
+            class_attended=class_obj,
+            date=date,
+            status=status,
+            marked_by_id=marked_by_id,
+            remarks=remarks,
+        )
+        for student_id, status in sorted(resolved.items())
+    ]
+    with transaction.atomic():
+        # Serialize roll calls for this class so the rollup deltas below are
+        # computed against statuses nobody else is changing
+        list(Class.objects.select_for_update().filter(pk=class_obj.pk).values_list('pk', flat=True))
+        previous = dict(
+            Attendance.objects.filter(class_attended=class_obj, date=date).values_list('student_id', 'status')
+        )
+        upsert_attendance(rows)
+        apply_rollup_deltas(rollup_deltas(
+            (
+                (student_id, class_obj.pk, date, previous[student_id]) if student_id in previous else None,
+                (student_id, class_obj.pk, date, status),
+            )
+            for student_id, status in resolved.items()
+        ))
+    return Counter(resolved.values())
@@ -0,0 +1,126 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+
+from .models import AuthToken
+
+
+TOKEN_CACHE_PREFIX = 'auth-token:'
+
+
+class TokenPrincipal:
+    """
+    The authenticated caller, as resolved from an access token.
+
+    Carries just enough to authorize a request (id, role, display name) so
+    the hot path does not need to load the User row.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, role, full_name):
+        self.id = id
+        self.role = role
+        self.full_name = full_name
+
+    def __str__(self):
+        return f"{self.full_name} ({self.role})"
+
+
+def _digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _cache_payload(user):
+    return {'id': user.id, 'role': user.role, 'full_name': user.get_full_name()}
+
+
+def _cache_timeout(expires_at):
+    # Never cache past the token's expiry, and re-check the database at least
+    # every AUTH_TOKEN_CACHE_TIMEOUT seconds so deactivations propagate.
+    remaining = int((expires_at - timezone.now()).total_seconds())
+    return max(1, min(remaining, settings.AUTH_TOKEN_CACHE_TIMEOUT))
+
+
+def issue_token(user):
+    """
+    Create an access token for ``user`` after a successful password check.
+    Returns (key, expires_at); the raw key is only ever returned here.
+    """
+    key = secrets.token_urlsafe(32)
+    expires_at = timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    digest = _digest(key)
+    AuthToken.objects.create(key_digest=digest, user=user, expires_at=expires_at)
+    cache.set(
+        TOKEN_CACHE_PREFIX + digest,
+        dict(_cache_payload(user), expires_at=expires_at),
+        timeout=_cache_timeout(expires_at),
+    )
+    return key, expires_at
+
+
+def resolve_token(key):
+    """
+    Return the TokenPrincipal for ``key``, or None if it is unknown or expired.
+    Served from the cache when possible; the database is only read on a miss.
+    """
+    digest = _digest(key)
+    payload = cache.get(TOKEN_CACHE_PREFIX + digest)
+    if payload is None:
+        # Always the primary: a lagging replica may not have a new token yet,
+        # or may still have one that was just revoked
+        token = (
+            AuthToken.objects
+            .using(DEFAULT_DB_ALIAS)
+            .select_related('user')
+            .filter(key_digest=digest, expires_at__gt=timezone.now(), user__is_active=True)
+            .first()
+        )
+        if token is None:
+            return None
+        payload = dict(_cache_payload(token.user), expires_at=token.expires_at)
+        cache.set(TOKEN_CACHE_PREFIX + digest, payload, timeout=_cache_timeout(token.expires_at))
+    elif payload['expires_at'] <= timezone.now():
+        return None
+    return TokenPrincipal(payload['id'], payload['role'], payload['full_name'])
+
+
+def revoke_token(key):
+    """Invalidate a token everywhere (logout)"""
+    digest = _digest(key)
+    AuthToken.objects.filter(key_digest=digest).delete()
+    cache.delete(TOKEN_CACHE_PREFIX + digest)
+
+
+def get_token_key(request):
+    """Extract the raw key from an 'Authorization: Bearer <key>' header"""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    parts = header.split()
+    if len(parts) == 2 and parts[0].lower() in ('bearer', 'token'):
+        return parts[1]
+    return None
+
+
+class TokenAuthentication(authentication.BaseAuthentication):
+    """
+    DRF authentication backed by the cache-fronted token store.
+    Requests without an Authorization header stay anonymous.
+    """
+
+    def authenticate(self, request):
+        key = get_token_key(request)
+        if key is None:
+            return None
+        principal = resolve_token(key)
+        if principal is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token')
+        return principal, key
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('students/<int:student_id>/dashboard/', views.student_dashboard_view, name='student-dashboard'),
+    path('staff/<int:staff_id>/dashboard/', views.staff_dashboard_view, name='staff-dashboard'),
+]
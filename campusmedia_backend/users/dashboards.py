@@ -0,0 +1,192 @@
+from django.core.cache import cache
+from django.db.models import Avg, Count, Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .academic import current_term
+from .feed import get_announcement_feed
+from .models import Attendance, AttendanceRollup, Class, ClassEnrollment, Grade, User
+from .replicas import read_from_primary
+
+
+RECENT_GRADES = 10
+DASHBOARD_ANNOUNCEMENTS = 5
+STAFF_DASHBOARD_CACHE_PREFIX = 'staff-dashboard:'
+STAFF_DASHBOARD_CACHE_TIMEOUT = 60  # seconds; roll calls and grades show up within a minute
+
+
+def _attendance(rollup):
+    if rollup is None:
+        return None
+    return {
+        'present': rollup.present,
+        'absent': rollup.absent,
+        'late': rollup.late,
+        'excused': rollup.excused,
+        'attendance_percentage': rollup.attendance_percentage
+    }
+
+
+def student_dashboard(student, term=None):
+    """
+    Everything the student home page shows, in a fixed number of queries
+    however many classes the student takes: enrollments (with class and
+    teacher), per-class grade averages, recent grades and this term's
+    attendance rollups, plus the cached Student announcement feed.
+    """
+    term = term or current_term()
+    enrollments = (
+        ClassEnrollment.objects
+        .filter(student=student)
+        .select_related('class_enrolled__teacher')
+        .order_by('class_enrolled__class_name')
+    )
+    grade_averages = {
+        row['class_graded_id']: row
+        for row in Grade.objects.filter(student=student)
+        .values('class_graded_id')
+        .annotate(average_score=Avg('score'), grades_count=Count('id'))
+        .order_by()
+    }
+    rollups = {
+        rollup.class_attended_id: rollup
+        for rollup in AttendanceRollup.objects.filter(student=student, term=term)
+    }
+    recent_grades = (
+        Grade.objects
+        .filter(student=student)
+        .select_related('class_graded')
+        .order_by('-created_at', '-id')[:RECENT_GRADES]
+    )
+
+    classes = []
+    for enrollment in enrollments:
+        class_obj = enrollment.class_enrolled
+        averages = grade_averages.get(class_obj.id, {})
+        average = averages.get('average_score')
+        classes.append({
+            'class_id': class_obj.id,
+            'class_name': class_obj.class_name,
+            'subject': class_obj.subject,
+            'schedule': class_obj.schedule,
+            'teacher_name': class_obj.teacher.get_full_name(),
+            'student_count': class_obj.student_count,
+            'average_score': round(average, 2) if average is not None else None,
+            'grades_count': averages.get('grades_count', 0),
+            'attendance': _attendance(rollups.get(class_obj.id))
+        })
+
+    # Overall figures across classes, from the same rows
+    totals = AttendanceRollup(student=student, term=term)
+    for rollup in rollups.values():
+        totals.present += rollup.present
+        totals.absent += rollup.absent
+        totals.late += rollup.late
+        totals.excused += rollup.excused
+    graded = sum(row['grades_count'] for row in grade_averages.values())
+    score_total = sum(row['average_score'] * row['grades_count'] for row in grade_averages.values())
+
+    feed = get_announcement_feed(role='Student', page_size=DASHBOARD_ANNOUNCEMENTS)
+    return {
+        'profile': {
+            'id': student.id,
+            'first_name': student.first_name,
+            'last_name': student.last_name,
+            'email': student.email,
+            'register_number': student.register_number,
+            'student_class': student.student_class,
+            'stream': student.stream,
+            'year': student.year,
+            'department': student.department,
+            'profile_completed': student.profile_completed
+        },
+        'term': term,
+        'stats': {
+            'enrolled_classes': len(classes),
+            'grades_recorded': graded,
+            'average_score': round(score_total / graded, 2) if graded else None,
+            'attendance_percentage': totals.attendance_percentage
+        },
+        'classes': classes,
+        'recent_grades': [{
+            'id': grade.id,
+            'class_id': grade.class_graded_id,
+            'class_name': grade.class_graded.class_name,
+            'assignment_name': grade.assignment_name,
+            'score': grade.score,
+            'grade_letter': grade.grade_letter,
+            'remarks': grade.remarks,
+            'created_at': grade.created_at
+        } for grade in recent_grades],
+        'announcements': feed['data']['announcements']
+    }
+
+
+def build_staff_dashboard(teacher_id):
+    """
+    The staff home page for one teacher: their classes with enrollment
+    count, whether today's attendance is taken and the average grade, all
+    annotated onto a single classes query, plus the Staff announcement
+    feed. Returns None if there is no such Staff/Principal user.
+    """
+    teacher = User.objects.filter(id=teacher_id, role__in=['Staff', 'Principal']).first()
+    if teacher is None:
+        return None
+
+    today = timezone.localdate()
+    grades = Grade.objects.filter(class_graded=OuterRef('pk')).values('class_graded')
+    classes = (
+        Class.objects
+        .filter(teacher=teacher, is_active=True)
+        .annotate(
+            attendance_taken=Exists(Attendance.objects.filter(class_attended=OuterRef('pk'), date=today)),
+            average_score=Subquery(grades.annotate(average=Avg('score')).values('average')),
+            grades_count=Subquery(grades.annotate(n=Count('id')).values('n')),
+        )
+        .order_by('class_name')
+    )
+
+    items = [{
+        'class_id': class_obj.id,
+        'class_name': class_obj.class_name,
+        'subject': class_obj.subject,
+        'schedule': class_obj.schedule,
+        'student_count': class_obj.student_count,
+        'attendance_taken_today': class_obj.attendance_taken,
+        'average_score': round(class_obj.average_score, 2) if class_obj.average_score is not None else None,
+        'grades_count': class_obj.grades_count or 0
+    } for class_obj in classes]
+
+    feed = get_announcement_feed(role='Staff', page_size=DASHBOARD_ANNOUNCEMENTS)
+    return {
+        'profile': {
+            'id': teacher.id,
+            'first_name': teacher.first_name,
+            'last_name': teacher.last_name,
+            'email': teacher.email,
+            'role': teacher.role,
+            'qualification': teacher.qualification,
+            'subject_expertise': teacher.subject_expertise,
+            'experience_years': teacher.experience_years,
+            'profile_completed': teacher.profile_completed
+        },
+        'date': today,
+        'stats': {
+            'classes_taught': len(items),
+            'total_students': sum(item['student_count'] for item in items),
+            'attendance_pending': sum(1 for item in items if not item['attendance_taken_today'])
+        },
+        'classes': items,
+        'announcements': feed['data']['announcements']
+    }
+
+
+def staff_dashboard(teacher_id):
+    """The staff dashboard, cached briefly per teacher and day; built on the primary"""
+    key = f'{STAFF_DASHBOARD_CACHE_PREFIX}{teacher_id}:{timezone.localdate().isoformat()}'
+    dashboard = cache.get(key)
+    if dashboard is None:
+        with read_from_primary():
+            dashboard = build_staff_dashboard(teacher_id)
+        if dashboard is not None:
+            cache.set(key, dashboard, timeout=STAFF_DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
@@ -0,0 +1,69 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Class, ClassEnrollment
+
+
+# Tries for a bulk enroll that collides with a concurrent single enrollment
+ENROLL_ATTEMPTS = 3
+
+
+def adjust_student_count(class_id, delta):
+    """Atomically add ``delta`` to a class's student_count in the database"""
+    if delta:
+        Class.objects.filter(pk=class_id).update(student_count=F('student_count') + delta)
+
+
+def enroll_students(class_obj, student_ids):
+    """
+    Enroll many students in one class with a single INSERT. Students already
+    enrolled are left alone. Returns the ids that were newly enrolled.
+    """
+    student_ids = set(student_ids)
+    for attempt in range(ENROLL_ATTEMPTS):
+        try:
+            return _enroll(class_obj, student_ids)
+        except IntegrityError:
+            # A single enrollment saved elsewhere doesn't take the class lock
+            # and slipped in between the read and the INSERT; start over
+            if attempt == ENROLL_ATTEMPTS - 1:
+                raise
+
+
+def _enroll(class_obj, student_ids):
+    with transaction.atomic():
+        # Lock the class so concurrent bulk enrolls agree on who is new
+        list(Class.objects.select_for_update().filter(pk=class_obj.pk).values_list('pk', flat=True))
+        already = set(ClassEnrollment.objects.filter(
+            class_enrolled=class_obj, student_id__in=student_ids,
+        ).values_list('student_id', flat=True))
+        new_ids = sorted(student_ids - already)
+        # bulk_create skips the post_save signal, so count them in one UPDATE.
+        # No ignore_conflicts: a skipped row would still be counted.
+        ClassEnrollment.objects.bulk_create(
+            [ClassEnrollment(class_enrolled=class_obj, student_id=student_id) for student_id in new_ids],
+            batch_size=1000,
+        )
+        adjust_student_count(class_obj.pk, len(new_ids))
+    return new_ids
+
+
+def unenroll_students(class_obj, student_ids):
+    """Remove many students from one class. Returns how many were enrolled."""
+    with transaction.atomic():
+        list(Class.objects.select_for_update().filter(pk=class_obj.pk).values_list('pk', flat=True))
+        student_ids = sorted(set(student_ids))
+        if not student_ids:
+            return 0
+        # A plain DELETE; going through delete() would send post_delete and
+        # decrement the counter once per row
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(ClassEnrollment._meta.db_table)} '
+                f'WHERE {quote("class_enrolled_id")} = %s AND {quote("student_id")} IN ({", ".join(["%s"] * len(student_ids))})',
+                [class_obj.pk, *student_ids],
+            )
+            removed = cursor.rowcount
+        adjust_student_count(class_obj.pk, -removed)
+    return removed
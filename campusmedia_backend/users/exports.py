@@ -0,0 +1,144 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+
+from .academic import academic_year_label
+from .archival import ARCHIVES, archived_years
+from .models import User, Attendance, Grade
+from .filters import filter_users
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ArchiveInProgress(ValueError):
+    """Raised when an export reaches into an academic year that is only partly archived"""
+
+# Columns streamed for each exportable resource. The first column must be the
+# primary key, it is what the chunked iteration seeks on.
+EXPORT_FIELDS = {
+    'users': (User, [
+        'id', 'first_name', 'last_name', 'email', 'register_number', 'phone', 'role',
+        'student_class', 'stream', 'year', 'department',
+        'qualification', 'subject_expertise', 'experience_years',
+        'is_active', 'profile_completed', 'created_at', 'updated_at',
+    ]),
+    'attendance': (Attendance, [
+        'id', 'student_id', 'class_attended_id', 'date', 'status',
+        'marked_by_id', 'remarks', 'created_at',
+    ]),
+    'grades': (Grade, [
+        'id', 'student_id', 'class_graded_id', 'assignment_name', 'score',
+        'grade_letter', 'graded_by_id', 'remarks', 'created_at', 'updated_at',
+    ]),
+}
+
+
+def iter_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield value tuples for ``queryset`` in primary key order, chunk by chunk.
+
+    Each chunk is a separate ``pk > last_pk LIMIT n`` query. The MySQL driver
+    buffers a whole result set client-side, so this bounds memory on every
+    backend instead of relying on server-side cursors.
+    """
+    queryset = queryset.order_by('pk').values_list(*fields)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+def ndjson_lines(rows, fields):
+    """One JSON object per line"""
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields):
+    """A header row followed by one CSV line per row"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _date_param(params, param):
+    if not params.get(param):
+        return None
+    value = parse_date(params[param])
+    if value is None:
+        raise ValueError(f'Invalid {param}')
+    return value
+
+
+def filter_export_queryset(resource, params, queryset=None):
+    """
+    Apply the supported query-string filters for an export to ``queryset``
+    (by default every row of the resource's model).
+    Raises ValueError on a malformed filter value.
+    """
+    if queryset is None:
+        model, _ = EXPORT_FIELDS[resource]
+        queryset = model.objects.all()
+
+    if resource == 'users':
+        return filter_users(queryset, params)
+
+    class_field = 'class_attended_id' if resource == 'attendance' else 'class_graded_id'
+    for param, field in (('class_id', class_field), ('student_id', 'student_id')):
+        if params.get(param):
+            if not params[param].isdigit():
+                raise ValueError(f'Invalid {param}')
+            queryset = queryset.filter(**{field: int(params[param])})
+
+    date_field = 'date' if resource == 'attendance' else 'created_at__date'
+    for param, lookup in (('date_from', 'gte'), ('date_to', 'lte')):
+        value = _date_param(params, param)
+        if value is not None:
+            queryset = queryset.filter(**{f'{date_field}__{lookup}': value})
+    return queryset
+
+
+def export_querysets(resource, params):
+    """
+    The filtered querysets an export reads, archives first. Archived
+    academic years are only read when date_from/date_to reach into one;
+    an export without a date range covers the live tables only.
+
+    Raises ArchiveInProgress if the range reaches into a year that is
+    still being archived (or whose archiving was interrupted): its rows
+    are split between the tables and still moving, so neither order of
+    reading them is complete.
+    """
+    queryset = filter_export_queryset(resource, params)
+    if resource not in ARCHIVES:
+        return [queryset]
+    date_from, date_to = _date_param(params, 'date_from'), _date_param(params, 'date_to')
+    if date_from is None and date_to is None:
+        return [queryset]
+    years = archived_years(date_from, date_to)
+    if not years:
+        return [queryset]
+    unfinished = [academic_year_label(year) for year, year_status in years if year_status != 'archived']
+    if unfinished:
+        raise ArchiveInProgress(
+            f'{", ".join(unfinished)} is still being archived; export it once archive_academic_year has finished')
+    _, archive, _ = ARCHIVES[resource]
+    archived = archive.objects.filter(academic_year__in=[academic_year_label(year) for year, _ in years])
+    return [filter_export_queryset(resource, params, archived), queryset]
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Announcement
+from .pagination import merged_keyset_page
+from .replicas import read_from_primary
+
+
+FEED_CACHE_PREFIX = 'announcements-feed'
+FEED_VERSION_KEY = 'announcements-feed:version'
+FEED_CHANGED_AT_KEY = 'announcements-feed:changed-at'
+FEED_CACHE_TIMEOUT = 300  # seconds; bounds staleness of author names
+FEED_CURSOR_SALT = 'announcements.feed'
+
+
+def _serialize_announcement(ann):
+    return {
+        'id': ann.id,
+        'title': ann.title,
+        'content': ann.content,
+        'created_by': ann.created_by.get_full_name(),
+        'target_role': ann.target_role,
+        'created_at': ann.created_at
+    }
+
+
+def build_announcement_feed(role, cursor, page_size):
+    """
+    Query and serialize one page of the active announcements visible to
+    ``role`` (its targeted ones plus global ones, where target_role is null).
+
+    Returns a dict holding the response body plus a strong ETag (hash of the
+    body) and a Last-Modified timestamp, so all three can be served from
+    cache. Raises InvalidCursor for a bad cursor.
+    """
+    base = Announcement.objects.filter(is_active=True).select_related('created_by')
+    # One range scan on (is_active, target_role, created_at) per audience
+    querysets = [base.filter(target_role__isnull=True)]
+    if role:
+        querysets.append(base.filter(target_role=role))
+    page, next_cursor = merged_keyset_page(querysets, cursor, page_size, FEED_CURSOR_SALT)
+
+    items = [_serialize_announcement(ann) for ann in page]
+    data = {
+        'success': True,
+        'count': len(items),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'announcements': items
+    }
+
+    # Take the newest edit across all rows, not just active ones, so that
+    # deactivating an announcement still moves Last-Modified forward.
+    last_modified = Announcement.objects.aggregate(latest=Max('updated_at'))['latest']
+    changed_at = cache.get(FEED_CHANGED_AT_KEY)
+    candidates = [ts for ts in (last_modified, changed_at) if ts is not None]
+    last_modified = max(candidates) if candidates else timezone.now()
+
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return {
+        'data': data,
+        'etag': '"%s"' % hashlib.sha256(body).hexdigest(),
+        'last_modified': int(last_modified.timestamp()),
+    }
+
+
+def _feed_version():
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def get_announcement_feed(role=None, cursor=None, page_size=20):
+    """
+    The cached feed page for this audience, rebuilt on a miss.
+
+    Every page of every audience is keyed under the current feed version, so
+    a single version bump invalidates all of them at once. Pages are built
+    on the primary, since they are cached under the version.
+    """
+    cursor_digest = hashlib.sha256((cursor or '').encode()).hexdigest()[:16]
+    key = f'{FEED_CACHE_PREFIX}:{_feed_version()}:{role or "-"}:{page_size}:{cursor_digest}'
+    feed = cache.get(key)
+    if feed is None:
+        # A lagging replica could still miss the change that bumped the version
+        with read_from_primary():
+            feed = build_announcement_feed(role, cursor, page_size)
+        cache.set(key, feed, timeout=FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def invalidate_announcement_feed():
+    """Drop the cached feed after an announcement is created, edited, deactivated or deleted"""
+    cache.set(FEED_CHANGED_AT_KEY, timezone.now(), timeout=None)
+    cache.set(FEED_VERSION_KEY, time.time_ns(), timeout=None)
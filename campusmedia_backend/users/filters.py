@@ -0,0 +1,30 @@
+from .models import User
+
+
+def parse_bool(value):
+    """Parse a true/false query parameter, returning None if absent or unrecognised"""
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    return None
+
+
+def filter_users(queryset, params):
+    """
+    Apply the ?role= and ?is_active= filters shared by the user list and export.
+    Raises ValueError on an unknown role.
+    """
+    role = params.get('role')
+    if role:
+        if role not in dict(User.ROLE_CHOICES):
+            raise ValueError('Invalid role')
+        queryset = queryset.filter(role=role)
+
+    is_active = parse_bool(params.get('is_active'))
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    return queryset
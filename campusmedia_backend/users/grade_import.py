@@ -0,0 +1,224 @@
+import codecs
+import csv
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import invalidate_class_grade_stats
+from .models import Class, ClassEnrollment, Grade
+
+
+IMPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+REQUIRED_COLUMNS = ('student_id', 'class_id', 'assignment_name', 'score')
+
+
+class GradeImportError(ValueError):
+    """
+    Raised when an import file can't be read (bad format or header). If it
+    fails part-way, ``created`` and ``updated`` count the rows that earlier
+    chunks already committed.
+    """
+    created = 0
+    updated = 0
+
+
+def _check_header(header):
+    header = [str(name or '').strip().lower() for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise GradeImportError(f'Missing column(s): {", ".join(missing)}')
+    return header
+
+
+def _csv_rows(lines):
+    reader = csv.reader(lines)
+    try:
+        header = _check_header(next(reader, []))
+        for values in reader:
+            if any(values):
+                # line_num counts lines read, so blank lines and quoted
+                # newlines don't throw the reported row off
+                yield reader.line_num, dict(zip(header, values))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise GradeImportError(f'Could not read CSV file: {e}')
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise GradeImportError('XLSX import requires openpyxl; upload a CSV instead')
+    # read_only streams rows from the sheet XML instead of loading the workbook
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:  # openpyxl raises assorted zip/XML errors
+        raise GradeImportError(f'Could not read XLSX file: {e}')
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _check_header(next(rows, []))
+        for line, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_grade_rows(fileobj, filename):
+    """
+    Yield (line number, row) for each data row of a CSV or XLSX upload; the
+    row is a dict keyed by the lowercased header and the line number is
+    the row's position in the file. ``fileobj`` is a binary file or Django
+    UploadedFile.
+    """
+    if filename.lower().endswith('.xlsx'):
+        return _xlsx_rows(fileobj)
+    return _csv_rows(codecs.iterdecode(fileobj, 'utf-8-sig'))
+
+
+def _parse_int(value):
+    try:
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_row(row):
+    """Return (key, score, remarks) for a row, or raise GradeImportError"""
+    student_id = _parse_int(row.get('student_id'))
+    class_id = _parse_int(row.get('class_id'))
+    assignment_name = str(row.get('assignment_name') or '').strip()
+    score = _parse_int(row.get('score'))
+    if student_id is None or class_id is None:
+        raise GradeImportError('student_id and class_id must be integers')
+    if not assignment_name or len(assignment_name) > 255:
+        raise GradeImportError('assignment_name is required (max 255 characters)')
+    if score is None or not 0 <= score <= 100:
+        raise GradeImportError('score must be a whole number from 0 to 100')
+    remarks = str(row.get('remarks') or '').strip() or None
+    return (student_id, class_id, assignment_name), score, remarks
+
+
+def _write_chunk(parsed, graded_by_id):
+    """
+    Upsert one chunk of {(student_id, class_id, assignment): (score, remarks)}.
+    Grades have no unique key to conflict on, so existing rows are looked up
+    once for the chunk and split into updates and a bulk_create.
+    Returns (created, updated).
+    """
+    student_ids = {key[0] for key in parsed}
+    class_ids = {key[1] for key in parsed}
+    assignments = {key[2] for key in parsed}
+    existing = {}
+    for pk, *key in Grade.objects.filter(
+        student_id__in=student_ids, class_graded_id__in=class_ids, assignment_name__in=assignments,
+    ).values_list('id', 'student_id', 'class_graded_id', 'assignment_name').order_by('id'):
+        existing.setdefault(tuple(key), pk)
+
+    # Scores take at most 101 values, so updates group into a few UPDATE ...
+    # WHERE id IN (...) statements instead of one per row.
+    keys = list(parsed)
+    letters = Grade.letters_for_scores([parsed[key][0] for key in keys])
+    to_create, to_update = [], defaultdict(list)
+    for key, letter in zip(keys, letters):
+        score, remarks = parsed[key]
+        if key in existing:
+            to_update[(score, letter, remarks)].append(existing[key])
+        else:
+            to_create.append(Grade(
+                student_id=key[0],
+                class_graded_id=key[1],
+                assignment_name=key[2],
+                score=score,
+                grade_letter=letter,
+                remarks=remarks,
+                graded_by_id=graded_by_id,
+            ))
+
+    now = timezone.now()
+    with transaction.atomic():
+        for (score, letter, remarks), ids in to_update.items():
+            Grade.objects.filter(pk__in=ids).update(
+                score=score, grade_letter=letter, remarks=remarks, graded_by_id=graded_by_id, updated_at=now,
+            )
+        if to_create:
+            Grade.objects.bulk_create(to_create, batch_size=500)
+    return len(to_create), sum(len(ids) for ids in to_update.values())
+
+
+def import_grades(rows, graded_by_id=None, teacher_id=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Create or update grades from numbered rows (see ``read_grade_rows``).
+
+    Rows are keyed on (student, class, assignment): an existing grade for
+    the key is overwritten, and within one file the last row for a key wins.
+    Each student must be enrolled in the class; with ``teacher_id`` set, only
+    that teacher's classes are accepted. Bad rows are skipped and reported,
+    the rest are written in chunked transactions.
+
+    Returns {'created', 'updated', 'skipped', 'errors': [{'row', 'message'}]}.
+    Raises GradeImportError if the file itself can't be read. Chunks before
+    the unreadable part stay committed; the error's ``created`` and
+    ``updated`` say how many rows they wrote.
+    """
+    classes = Class.objects.all()
+    if teacher_id is not None:
+        classes = classes.filter(teacher_id=teacher_id)
+    class_ids = set(classes.values_list('id', flat=True))
+
+    report = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+    touched_classes = set()
+
+    def reject(line, message):
+        report['skipped'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': line, 'message': message})
+
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            parsed, lines = {}, {}
+            for line, row in chunk:
+                try:
+                    key, score, remarks = _parse_row(row)
+                except GradeImportError as e:
+                    reject(line, str(e))
+                    continue
+                if key[1] not in class_ids:
+                    reject(line, f'Unknown class or not allowed: {key[1]}')
+                    continue
+                if key in parsed:
+                    report['skipped'] += 1  # superseded by this later row
+                parsed[key] = (score, remarks)
+                lines[key] = line
+
+            enrolled = set(ClassEnrollment.objects.filter(
+                student_id__in={key[0] for key in parsed},
+                class_enrolled_id__in={key[1] for key in parsed},
+            ).values_list('student_id', 'class_enrolled_id'))
+            for key in [key for key in parsed if key[:2] not in enrolled]:
+                del parsed[key]
+                reject(lines[key], f'Student {key[0]} is not enrolled in class {key[1]}')
+
+            if parsed:
+                created, updated = _write_chunk(parsed, graded_by_id)
+                report['created'] += created
+                report['updated'] += updated
+                touched_classes.update(key[1] for key in parsed)
+
+    except GradeImportError as e:
+        e.created, e.updated = report['created'], report['updated']
+        raise
+    finally:
+        # bulk writes don't send post_save, so drop the cached stats here
+        if touched_classes:
+            invalidate_class_grade_stats(*touched_classes)
+    return report
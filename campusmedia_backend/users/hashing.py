@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class PasswordQueueFull(Exception):
+    """Raised when too many password hashes are already waiting to run"""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def get_password_executor():
+    """
+    The process-wide thread pool that runs PBKDF2.
+
+    hashlib's PBKDF2 releases the GIL, so a handful of threads hash in
+    parallel without blocking the event loop.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix='password-hash',
+                )
+    return _executor
+
+
+async def run_password_task(func, *args):
+    """
+    Run a password hash/verify call on the bounded executor.
+
+    At most PASSWORD_HASH_MAX_PENDING calls may be queued or running at
+    once; beyond that PasswordQueueFull is raised so the caller can shed
+    load instead of letting latency grow without bound.
+    """
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordQueueFull()
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
@@ -0,0 +1,93 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.academic import academic_year_label
+from users.analytics import invalidate_class_grade_stats
+from users.archival import ARCHIVES, is_closed, move_rows, year_lookups
+from users.models import ArchivedAcademicYear
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the attendance and grades of a closed academic year into the archive tables, '
+        'a batch at a time. Safe to interrupt and re-run; it picks up where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', help='Academic year to archive, e.g. 2024 or 2024-25')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows moved per transaction')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between batches, to let replicas keep up')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would move')
+
+    def handle(self, *args, **options):
+        start_year = self._parse_year(options['year'])
+        label = academic_year_label(start_year)
+        if not is_closed(start_year):
+            raise CommandError(f'{label} has not ended yet; only closed academic years can be archived')
+
+        if options['dry_run']:
+            for resource, (model, _, date_field) in ARCHIVES.items():
+                count = model.objects.filter(**year_lookups(date_field, start_year)).count()
+                self.stdout.write(f'{resource}: {count} row(s) from {label} would be archived')
+            return
+
+        record, created = ArchivedAcademicYear.objects.get_or_create(start_year=start_year, defaults={'label': label})
+        if not created:
+            self.stdout.write(f'Resuming {label} ({record.status})')
+
+        for resource in ARCHIVES:
+            moved = self._archive(resource, start_year, label, record, options['batch_size'], options['pause'])
+            self.stdout.write(f'{resource}: moved {moved} row(s)')
+
+        ArchivedAcademicYear.objects.filter(pk=record.pk).update(status='archived', completed_at=timezone.now())
+        record.refresh_from_db()
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {label}: {record.attendance_rows} attendance and {record.grade_rows} grade row(s) in total'
+        ))
+
+    def _parse_year(self, value):
+        match = re.fullmatch(r'(\d{4})(?:-(\d{2}))?', value)
+        if match is None:
+            raise CommandError('Year must look like 2024 or 2024-25')
+        start_year = int(match.group(1))
+        if match.group(2) and academic_year_label(start_year) != value:
+            raise CommandError(f'{value} is not an academic year; did you mean {academic_year_label(start_year)}?')
+        return start_year
+
+    def _archive(self, resource, start_year, label, record, batch_size, pause):
+        model, archive, date_field = ARCHIVES[resource]
+        class_field = 'class_attended_id' if resource == 'attendance' else 'class_graded_id'
+        counter = 'attendance_rows' if resource == 'attendance' else 'grade_rows'
+        # Always the oldest remaining rows: moved ones are gone from the hot
+        # table, so no cursor is needed to resume
+        pending = (
+            model.objects
+            .filter(**year_lookups(date_field, start_year))
+            .order_by('pk')
+            .values_list('pk', class_field)
+        )
+        moved = 0
+        class_ids = set()
+        while True:
+            with transaction.atomic():
+                # Lock the batch so nobody edits a row between the copy and the delete
+                rows = list(pending.select_for_update()[:batch_size])
+                if not rows:
+                    break
+                count = move_rows(model, archive, [pk for pk, _ in rows], label)
+                ArchivedAcademicYear.objects.filter(pk=record.pk).update(**{counter: F(counter) + count})
+            moved += count
+            class_ids.update(class_id for _, class_id in rows)
+            self.stdout.write(f'{resource}: {moved} row(s) moved so far')
+            if pause:
+                time.sleep(pause)
+
+        if resource == 'grades' and class_ids:
+            invalidate_class_grade_stats(*class_ids)
+        return moved
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Trim
+from django.utils import timezone
+
+from users.models import User
+
+
+# Same rules the details pages use: students who gave their class, and
+# staff/principals who gave their qualification, have completed a profile
+COMPLETED = (
+    Q(role='Student', student_class_trimmed__gt='')
+    | Q(role__in=['Staff', 'Principal'], qualification_trimmed__gt='')
+)
+
+
+class Command(BaseCommand):
+    help = 'Mark profile_completed for users who have filled in their details, one id range per UPDATE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Ids covered by each UPDATE')
+        parser.add_argument('--start-after', type=int, default=0,
+                            help='Resume after this user id (printed as progress)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the users that would be updated')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        max_pk = User.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        pending = (
+            User.objects
+            .filter(profile_completed=False)
+            .alias(student_class_trimmed=Trim('student_class'), qualification_trimmed=Trim('qualification'))
+            .filter(COMPLETED)
+        )
+
+        total = 0
+        low = options['start_after']
+        while low < max_pk:
+            high = min(low + batch_size, max_pk)
+            chunk = pending.filter(pk__gt=low, pk__lte=high)
+            if dry_run:
+                count = chunk.count()
+            else:
+                # One short transaction per range keeps row locks brief
+                with transaction.atomic():
+                    count = chunk.update(profile_completed=True, updated_at=timezone.now())
+            total += count
+            self.stdout.write(f'Ids {low + 1}-{high}: {count}')
+            low = high
+
+        verb = 'would mark' if dry_run else 'marked'
+        self.stdout.write(self.style.SUCCESS(f'Done: {verb} {total} user(s) as profile completed'))
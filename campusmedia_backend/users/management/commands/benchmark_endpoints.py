@@ -0,0 +1,269 @@
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from users.analytics import percentile
+from users.authentication import issue_token
+from users.models import ClassEnrollment, User
+
+
+class Scenario:
+    """
+    One endpoint to drive. ``build`` returns (path, body, headers) for the
+    next request; it runs outside the timed section, so per-request setup
+    such as issuing a token for logout isn't counted as latency.
+    """
+
+    def __init__(self, name, method, build, write=False):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.write = write
+
+
+def _json(data):
+    return json.dumps(data).encode(), {'Content-Type': 'application/json'}
+
+
+def _multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: text/csv\r\n\r\n{content}\r\n--{boundary}--\r\n'
+    ).encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def _unique():
+    return uuid.uuid4().hex[:12]
+
+
+def build_scenarios(fixtures, password):
+    """Every route in users/urls.py plus the dashboards, as Scenarios"""
+    student, teacher, principal, admin = (fixtures[role] for role in ('student', 'teacher', 'principal', 'admin'))
+    class_id, enrolled, spare = fixtures['class_id'], fixtures['enrolled'], fixtures['spare_student']
+    bearer = {role: {'Authorization': f'Bearer {issue_token(user)[0]}'} for role, user in (
+        ('student', student), ('teacher', teacher), ('principal', principal), ('admin', admin))}
+
+    def get(name, path, role=None):
+        return Scenario(name, 'GET', lambda: (path, None, bearer[role] if role else {}))
+
+    def post(name, path, role, payload):
+        def build():
+            body, headers = payload()
+            return path, body, dict(headers, **(bearer[role] if role else {}))
+        return Scenario(name, 'POST', build, write=True)
+
+    def register():
+        tag = _unique()
+        return _json({
+            'first_name': 'Bench', 'last_name': 'User', 'email': f'bench-{tag}@bench.campus.edu',
+            'register_number': f'BENCH-{tag}', 'phone': '9876543210', 'role': 'Student', 'password': password,
+        })
+
+    def logout():
+        # Each request revokes its own fresh token
+        return None, {'Authorization': f'Bearer {issue_token(student)[0]}'}
+
+    def provision():
+        tag = _unique()
+        return _json({'users': [{
+            'first_name': 'Bench', 'last_name': 'Provisioned', 'email': f'bench-{tag}@bench.campus.edu',
+            'register_number': f'BENCH-{tag}', 'phone': '9876543210', 'role': 'Student', 'password': password,
+        }]})
+
+    grades_csv = 'student_id,class_id,assignment_name,score\n' + ''.join(
+        f'{student_id},{class_id},Benchmark,{60 + n % 40}\n' for n, student_id in enumerate(enrolled))
+    today = str(timezone.localdate())
+
+    return [
+        get('users-list', reverse('users-list') + '?page_size=50'),
+        get('users-search', reverse('users-search') + f'?q={student.first_name[:3]}'),
+        get('user-detail', reverse('user-detail', args=[student.id])),
+        get('announcements-list', reverse('announcements-list') + '?role=Student', 'student'),
+        get('announcements-search', reverse('announcements-search') + '?q=notice', 'student'),
+        get('export-records', reverse('export-records', args=['grades']) + f'?format=csv&class_id={class_id}', 'principal'),
+        get('attendance-summary', reverse('attendance-summary', args=[student.id]), 'student'),
+        get('classes-list', reverse('classes-list') + f'?teacher_id={teacher.id}'),
+        get('class-grade-stats', reverse('class-grade-stats', args=[class_id]), 'teacher'),
+        get('login-throttle-stats', reverse('login-throttle-stats'), 'admin'),
+        get('student-dashboard', reverse('student-dashboard', args=[student.id]), 'student'),
+        get('staff-dashboard', reverse('staff-dashboard', args=[teacher.id]), 'teacher'),
+        post('login', reverse('login'), None,
+             lambda: _json({'email': student.email, 'password': password, 'role': 'Student'})),
+        post('logout', reverse('logout'), None, logout),
+        post('register', reverse('register'), None, register),
+        post('provision-users', reverse('provision-users'), 'admin', provision),
+        post('update-student-details', reverse('update-student-details'), 'student', lambda: _json({
+            'student_class': student.student_class or 'Year 1', 'stream': student.stream or 'Science',
+            'year': student.year or '2026', 'department': student.department or 'Physics'})),
+        post('update-staff-details', reverse('update-staff-details'), 'teacher', lambda: _json({
+            'qualification': teacher.qualification or 'M.Sc', 'subject_expertise': teacher.subject_expertise or 'Physics',
+            'experience_years': teacher.experience_years or 5})),
+        post('create-announcement', reverse('create-announcement'), 'teacher',
+             lambda: _json({'title': f'Benchmark {_unique()}', 'content': 'Load test', 'target_role': 'Staff'})),
+        post('mark-attendance', reverse('mark-attendance'), 'teacher',
+             lambda: _json({'class_id': class_id, 'date': today, 'default_status': 'P', 'statuses': {}})),
+        post('class-enroll', reverse('class-enroll', args=[class_id]), 'teacher',
+             lambda: _json({'student_ids': [spare.id]})),
+        post('class-unenroll', reverse('class-unenroll', args=[class_id]), 'teacher',
+             lambda: _json({'student_ids': [spare.id]})),
+        post('grades-import', reverse('grades-import'), 'teacher',
+             lambda: _multipart('file', 'grades.csv', grades_csv)),
+    ]
+
+
+def load_fixtures():
+    """A student, their teacher, a principal and an admin to act as"""
+    enrollment = (ClassEnrollment.objects.filter(student__is_active=True, class_enrolled__teacher__role='Staff')
+                  .select_related('student', 'class_enrolled__teacher').order_by('pk').first())
+    principal = User.objects.filter(role='Principal', is_active=True).order_by('pk').first()
+    admin = User.objects.filter(role='Admin', is_active=True).order_by('pk').first()
+    if enrollment is None or principal is None or admin is None:
+        raise CommandError('Need an enrolled student, a principal and an admin; run generate_campus first')
+    class_obj = enrollment.class_enrolled
+    enrolled = list(ClassEnrollment.objects.filter(class_enrolled=class_obj)
+                    .order_by('student_id').values_list('student_id', flat=True)[:50])
+    spare = (User.objects.filter(role='Student', is_active=True)
+             .exclude(enrolled_classes__class_enrolled=class_obj).order_by('pk').first()) or enrollment.student
+    return {
+        'student': enrollment.student,
+        'teacher': class_obj.teacher,
+        'principal': principal,
+        'admin': admin,
+        'class_id': class_obj.id,
+        'enrolled': enrolled,
+        'spare_student': spare,
+    }
+
+
+def summarize(latencies, errors, elapsed):
+    """Latency percentiles (ms) and throughput for one endpoint's timed requests"""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2) if ordered else None,
+        **{f'p{pct}_ms': round(percentile(ordered, pct) * 1000, 2) if ordered else None for pct in (50, 95, 99)},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Endpoints whose p95 grew by more than ``tolerance`` (a fraction) or
+    that started failing, compared with a saved baseline.
+    Returns [(name, message)].
+    """
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None or not before.get('p95_ms'):
+            continue
+        if current['errors'] and not before.get('errors'):
+            regressions.append((name, f"{current['errors']} error(s), baseline had none"))
+        elif current['p95_ms'] is not None and current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            change = (current['p95_ms'] / before['p95_ms'] - 1) * 100
+            regressions.append((name, f"p95 {before['p95_ms']}ms -> {current['p95_ms']}ms (+{change:.0f}%)"))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test every API endpoint on a running server with concurrent requests, report '
+        'p50/p95/p99 latency and throughput, and optionally compare with a saved baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint first')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only these route names (repeatable)')
+        parser.add_argument('--writes', action='store_true',
+                            help='Include POST endpoints; they create users, tokens, announcements and grades')
+        parser.add_argument('--password', default='Campus@123', help="The generated users' password, for login")
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds per request')
+        parser.add_argument('--save-baseline', metavar='PATH', help='Write the results to PATH as JSON')
+        parser.add_argument('--baseline', metavar='PATH', help='Compare with results saved by --save-baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p95 growth over the baseline, as a fraction (default 0.2)')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'Could not read baseline: {e}')
+
+        # Tokens are issued straight into the database the server uses, so
+        # the server must share this settings module's DATABASES and cache
+        scenarios = build_scenarios(load_fixtures(), options['password'])
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f'Unknown endpoint(s): {", ".join(sorted(unknown))}')
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['endpoints']]
+        elif not options['writes']:
+            scenarios = [scenario for scenario in scenarios if not scenario.write]
+
+        base_url = options['base_url'].rstrip('/')
+        results = {}
+        self.stdout.write(f"{'endpoint':<24} {'reqs':>5} {'errs':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for scenario in scenarios:
+                for _ in range(options['warmup']):
+                    self._request(base_url, scenario, options['timeout'])
+                started = time.perf_counter()
+                outcomes = list(pool.map(
+                    lambda _: self._request(base_url, scenario, options['timeout']), range(options['requests'])))
+                elapsed = time.perf_counter() - started
+                errors = sum(1 for _, status in outcomes if not 200 <= status < 400)
+                stats = results[scenario.name] = summarize([latency for latency, _ in outcomes], errors, elapsed)
+                self.stdout.write(
+                    f"{scenario.name:<24} {stats['requests']:>5} {errors:>5} {stats['throughput']:>8} "
+                    f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+                )
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump({
+                    'base_url': base_url,
+                    'concurrency': options['concurrency'],
+                    'created_at': timezone.now().isoformat(),
+                    'results': results,
+                }, f, indent=2)
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['tolerance'])
+            for name, message in regressions:
+                self.stderr.write(f'{name}: {message}')
+            if regressions:
+                raise CommandError(f'{len(regressions)} endpoint(s) regressed against the baseline')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def _request(self, base_url, scenario, timeout):
+        """Returns (seconds, status); status 0 means no response at all"""
+        path, body, headers = scenario.build()
+        request = Request(base_url + path, data=body, headers=headers, method=scenario.method)
+        started = time.perf_counter()
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            e.read()
+            status = e.code
+        except (URLError, OSError):
+            status = 0
+        return time.perf_counter() - started, status
@@ -0,0 +1,270 @@
+import datetime
+import random
+import time
+from collections import Counter, defaultdict
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.academic import term_for_date
+from users.models import Announcement, Attendance, AttendanceRollup, Class, ClassEnrollment, Grade, User
+from users.rollups import STATUS_FIELDS
+from users.typeahead import index_users
+
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil', 'Priya',
+    'Rahul', 'Riya', 'Rohan', 'Sara', 'Siddharth', 'Sneha', 'Tanvi', 'Varun', 'Vikram', 'Zara',
+]
+LAST_NAMES = [
+    'Agarwal', 'Bose', 'Chopra', 'Das', 'Gupta', 'Iyer', 'Joshi', 'Kapoor', 'Khan', 'Menon',
+    'Nair', 'Patel', 'Rao', 'Reddy', 'Shah', 'Sharma', 'Singh', 'Thomas', 'Verma', 'Yadav',
+]
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'History', 'Economics', 'Computer Science']
+STREAMS = ['Science', 'Commerce', 'Arts']
+SCHEDULES = ['Mon, Wed, Fri • 9:00 AM', 'Tue, Thu • 11:00 AM', 'Mon, Wed • 2:00 PM', 'Fri • 10:00 AM']
+# Attendance.status -> relative frequency
+STATUS_WEIGHTS = {'Present': 85, 'Late': 6, 'Absent': 7, 'Excused': 2}
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with a synthetic campus (users, classes, enrollments, attendance, grades, '
+        'announcements) for load testing. Rows are written with batched multi-row inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50000)
+        parser.add_argument('--staff', type=int, default=1000)
+        parser.add_argument('--classes', type=int, default=2000)
+        parser.add_argument('--classes-per-student', type=int, default=5)
+        parser.add_argument('--sessions', type=int, default=20,
+                            help='Attendance days per class, the most recent weekdays')
+        parser.add_argument('--grades-per-enrollment', type=int, default=4)
+        parser.add_argument('--announcements', type=int, default=200)
+        parser.add_argument('--domain', default='gen.campus.edu',
+                            help='Email domain for generated users; must not be in use yet')
+        parser.add_argument('--password', default='Campus@123', help='Password shared by every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for a reproducible campus')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+        domain = options['domain']
+        if User.objects.filter(email__endswith=f'@{domain}').exists():
+            raise CommandError(f'Users @{domain} already exist; pick another --domain')
+        if options['classes'] < options['classes_per_student']:
+            raise CommandError('--classes must be at least --classes-per-student')
+
+        started = time.monotonic()
+        # One hash for everyone: PBKDF2 per user would take longer than the rest put together
+        password = make_password(options['password'])
+
+        staff_ids = self._phase('staff', lambda: self._create_users('Staff', options['staff'], domain, password))
+        self._create_users('Principal', 1, domain, password)
+        self._create_users('Admin', 1, domain, password)
+        student_ids = self._phase('students', lambda: self._create_users('Student', options['students'], domain, password))
+        class_teachers = self._phase('classes', lambda: self._create_classes(options['classes'], staff_ids))
+        enrollments = self._phase('enrollments', lambda: self._enroll(
+            student_ids, list(class_teachers), options['classes_per_student']))
+        self._phase('attendance', lambda: self._mark_attendance(enrollments, class_teachers, options['sessions']))
+        self._phase('grades', lambda: self._grade(enrollments, class_teachers, options['grades_per_enrollment']))
+        self._phase('announcements', lambda: self._announce(options['announcements'], staff_ids))
+        self._phase('search index', lambda: self._index(domain))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done in {time.monotonic() - started:.1f}s: log in as admin1@{domain}, principal1@{domain}, '
+            f'staff1@{domain} or student1@{domain} with password {options["password"]!r}'
+        ))
+
+    def _phase(self, name, func):
+        started = time.monotonic()
+        result = func()
+        self.stdout.write(f'{name}: {self.rows} row(s) in {time.monotonic() - started:.1f}s')
+        return result
+
+    def _insert(self, model, fields, rows):
+        """
+        Insert tuples of raw column values with executemany, which the MySQL
+        driver folds into multi-row INSERTs. Much cheaper than bulk_create
+        for millions of rows, as no model instances are built.
+        """
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+        sql = f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({", ".join(["%s"] * len(fields))})'
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(sql, batch)
+                batch = []
+        if batch:
+            self._flush(sql, batch)
+
+    def _flush(self, sql, batch):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        self.rows += len(batch)
+
+    def _create_users(self, role, count, domain, password):
+        self.rows = 0
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        prefix = role.lower()
+        fields = ['first_name', 'last_name', 'email', 'register_number', 'phone', 'role', 'password',
+                  'student_class', 'stream', 'year', 'department', 'qualification', 'subject_expertise',
+                  'experience_years', 'is_active', 'profile_completed', 'created_at', 'updated_at']
+
+        def rows():
+            rng = self.rng
+            for n in range(1, count + 1):
+                student = role == 'Student'
+                subject = rng.choice(SUBJECTS)
+                yield (
+                    rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f'{prefix}{n}@{domain}',
+                    f'{domain.split(".")[0].upper()}-{role[:3].upper()}{n:06d}', f'9{rng.randrange(10 ** 9):09d}',
+                    role, password,
+                    f'Year {rng.randint(1, 4)}' if student else None,
+                    rng.choice(STREAMS) if student else None,
+                    str(rng.randint(2022, 2026)) if student else None,
+                    subject if student else None,
+                    None if student else f'M.Sc {subject}',
+                    None if student else subject,
+                    None if student else rng.randint(1, 30),
+                    True, True, now, now,
+                )
+
+        self._insert(User, fields, rows())
+        return list(User.objects.filter(email__endswith=f'@{domain}', role=role).order_by('pk').values_list('pk', flat=True))
+
+    def _create_classes(self, count, staff_ids):
+        """Returns {class_id: teacher_id}"""
+        self.rows = 0
+        if not staff_ids:
+            raise CommandError('At least one --staff member is needed to teach the classes')
+        last_pk = Class.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        classes = [
+            Class(
+                class_name=f'{subject} {n:04d}',
+                subject=subject,
+                schedule=self.rng.choice(SCHEDULES),
+                teacher_id=self.rng.choice(staff_ids),
+            )
+            for n, subject in ((n, self.rng.choice(SUBJECTS)) for n in range(1, count + 1))
+        ]
+        for batch in _batches(classes, self.batch_size):
+            with transaction.atomic():
+                Class.objects.bulk_create(batch)
+            self.rows += len(batch)
+        # bulk_create doesn't return keys on MySQL, so read back everything past the old last key
+        return dict(Class.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'teacher_id'))
+
+    def _enroll(self, student_ids, class_ids, per_student):
+        """Returns {class_id: [student_id, ...]}"""
+        self.rows = 0
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        rosters = defaultdict(list)
+        for student_id in student_ids:
+            for class_id in self.rng.sample(class_ids, per_student):
+                rosters[class_id].append(student_id)
+
+        self._insert(ClassEnrollment, ['student', 'class_enrolled', 'enrolled_at'], (
+            (student_id, class_id, now) for class_id, roster in rosters.items() for student_id in roster
+        ))
+        # Raw inserts skip the enrollment signals; set the counters in a few
+        # UPDATEs, one per distinct class size
+        by_size = defaultdict(list)
+        for class_id in class_ids:
+            by_size[len(rosters.get(class_id, ()))].append(class_id)
+        for size, ids in by_size.items():
+            for start in range(0, len(ids), self.batch_size):
+                Class.objects.filter(pk__in=ids[start:start + self.batch_size]).update(student_count=size)
+        return rosters
+
+    def _mark_attendance(self, rosters, class_teachers, sessions):
+        """Attendance for the last ``sessions`` weekdays, with the rollups it implies"""
+        self.rows = 0
+        dates = []
+        day = timezone.localdate()
+        while len(dates) < sessions:
+            day -= datetime.timedelta(days=1)
+            if day.weekday() < 5:
+                dates.append(day)
+        adapted = [(connection.ops.adapt_datefield_value(date), term_for_date(date)) for date in dates]
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        counts = defaultdict(Counter)
+
+        def rows():
+            choices = self.rng.choices
+            for class_id, roster in rosters.items():
+                teacher_id = class_teachers[class_id]
+                for date, term in adapted:
+                    for student_id, status in zip(roster, choices(statuses, weights, k=len(roster))):
+                        counts[(student_id, class_id, term)][status] += 1
+                        yield student_id, class_id, date, status, teacher_id, now
+
+        self._insert(Attendance, ['student', 'class_attended', 'date', 'status', 'marked_by', 'created_at'], rows())
+
+        # Raw inserts skip the rollup signals, so write the rollups directly
+        rollups = (
+            AttendanceRollup(
+                student_id=student_id, class_attended_id=class_id, term=term,
+                **{field: counter.get(status, 0) for status, field in STATUS_FIELDS.items()},
+            )
+            for (student_id, class_id, term), counter in counts.items()
+        )
+        for batch in _batches(rollups, self.batch_size):
+            with transaction.atomic():
+                AttendanceRollup.objects.bulk_create(batch)
+
+    def _grade(self, rosters, class_teachers, per_enrollment):
+        self.rows = 0
+        assignments = [f'Assignment {n}' for n in range(1, per_enrollment + 1)]
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        def rows():
+            gauss = self.rng.gauss
+            for class_id, roster in rosters.items():
+                teacher_id = class_teachers[class_id]
+                for assignment in assignments:
+                    scores = [min(100, max(0, round(gauss(72, 14)))) for _ in roster]
+                    for student_id, score, letter in zip(roster, scores, Grade.letters_for_scores(scores)):
+                        yield student_id, class_id, assignment, score, letter, teacher_id, now, now
+
+        self._insert(Grade, ['student', 'class_graded', 'assignment_name', 'score', 'grade_letter',
+                             'graded_by', 'created_at', 'updated_at'], rows())
+
+    def _announce(self, count, staff_ids):
+        # Few enough to save one by one, which keeps the search index in step
+        self.rows = 0
+        for n in range(1, count + 1):
+            Announcement.objects.create(
+                title=f'{self.rng.choice(SUBJECTS)} notice {n}',
+                content=f'Update {n} for {self.rng.choice(STREAMS)} students: {self.rng.choice(SCHEDULES)}',
+                created_by_id=self.rng.choice(staff_ids),
+                target_role=self.rng.choice([None, None, 'Student', 'Staff']),
+            )
+            self.rows += 1
+
+    def _index(self, domain):
+        self.rows = 0
+        rows = (User.objects.filter(email__endswith=f'@{domain}').order_by('pk')
+                .values_list('id', 'first_name', 'last_name', 'email', 'register_number'))
+        for batch in _batches(rows.iterator(chunk_size=self.batch_size), self.batch_size):
+            with transaction.atomic():
+                index_users(batch)
+            self.rows += len(batch)
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.grade_import import IMPORT_CHUNK_SIZE, GradeImportError, import_grades, read_grade_rows
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Create or update grades from a CSV or XLSX file (student_id, class_id, assignment_name, score[, remarks])'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument('--graded-by', type=int, help='User id recorded as grader')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        graded_by = options['graded_by']
+        if graded_by is not None and not User.objects.filter(id=graded_by, role__in=['Staff', 'Principal']).exists():
+            raise CommandError(f'No Staff or Principal user with id {graded_by}')
+
+        try:
+            with open(options['path'], 'rb') as f:
+                report = import_grades(
+                    read_grade_rows(f, options['path']),
+                    graded_by_id=graded_by,
+                    chunk_size=options['chunk_size'],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except GradeImportError as e:
+            if e.created or e.updated:
+                raise CommandError(f'{e} ({e.created} created and {e.updated} updated before the error were kept)')
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['message']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {report['created']} created, {report['updated']} updated, {report['skipped']} skipped"
+        ))
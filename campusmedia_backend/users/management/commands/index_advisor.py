@@ -0,0 +1,297 @@
+import json
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections
+from django.test import Client
+
+from .benchmark_endpoints import build_scenarios, load_fixtures
+
+
+# A column compared in a WHERE clause: "table"."column" = / IN / < ...
+# (backticks on MySQL), or a bare boolean column as Django writes
+# filter(is_active=True). Equalities come first in a suggested index,
+# ranges after them.
+COMPARISON = re.compile(
+    r'[`"](\w+)[`"]\.[`"](\w+)[`"]\s*(=|IN\b|IS\b|<=|>=|<|>|BETWEEN\b|LIKE\b|AND\b|OR\b|\)|$)', re.IGNORECASE)
+EQUALITY_OPERATORS = {'=', 'IN', 'IS', 'AND', 'OR', ')', ''}
+CLAUSE_END = re.compile(r'\b(GROUP BY|ORDER BY|LIMIT|HAVING)\b', re.IGNORECASE)
+ORDER_COLUMN = re.compile(r'[`"](\w+)[`"]\.[`"](\w+)[`"]')
+
+
+class QueryLog:
+    """
+    execute_wrapper that records every statement run on a connection with
+    its parameters and duration, tagged with the current workload step.
+    """
+
+    def __init__(self, alias, entries):
+        self.alias = alias
+        self.entries = entries
+        self.label = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.entries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': None if many else list(params or ()),
+                'seconds': time.perf_counter() - started,
+                'label': self.label,
+            })
+
+
+def group_statements(entries):
+    """
+    Fold a query log into one row per distinct statement (same SQL, same
+    database), slowest total time first. Placeholders are already in the
+    SQL, so no normalizing is needed. The slowest run's params are kept
+    for EXPLAIN.
+    """
+    groups = {}
+    for entry in entries:
+        key = (entry['alias'], entry['sql'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                'alias': entry['alias'], 'sql': entry['sql'], 'count': 0, 'seconds': 0.0,
+                'max_seconds': -1.0, 'params': None, 'labels': set(),
+            }
+        group['count'] += 1
+        group['seconds'] += entry['seconds']
+        if entry['label']:
+            group['labels'].add(entry['label'])
+        if entry['params'] is not None and entry['seconds'] > group['max_seconds']:
+            group['max_seconds'] = entry['seconds']
+            group['params'] = entry['params']
+    return sorted(groups.values(), key=lambda group: group['seconds'], reverse=True)
+
+
+def explain(connection, sql, params):
+    """
+    Problems in the plan of a SELECT, as (table, problem) pairs: 'full scan'
+    when a table is read without an index, 'sort' when rows are sorted
+    or grouped in a temporary structure. Supports MySQL and SQLite.
+    """
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            columns = [description[0].lower() for description in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        problems = []
+        for row in rows:
+            table, extra = row.get('table'), row.get('extra') or ''
+            if table and not table.startswith('<') and row.get('type') == 'ALL':
+                problems.append((table, 'full scan'))
+            if table and ('Using filesort' in extra or 'Using temporary' in extra):
+                problems.append((table, 'sort'))
+        return problems
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = [row[-1] for row in cursor.fetchall()]
+        problems = []
+        first_table = None
+        for detail in details:
+            words = detail.split()
+            if words[0] in ('SCAN', 'SEARCH') and len(words) > 1:
+                # "SCAN TABLE users" before SQLite 3.36, "SCAN users" since
+                table = words[2] if words[1] == 'TABLE' and len(words) > 2 else words[1]
+                first_table = first_table or table
+                if words[0] == 'SCAN' and 'INDEX' not in words:
+                    problems.append((table, 'full scan'))
+            elif detail.startswith('USE TEMP B-TREE') and first_table:
+                # SQLite doesn't say which table the sort is for; ORDER BY
+                # normally follows the outermost one
+                problems.append((first_table, 'sort'))
+        return problems
+
+    raise CommandError(f'EXPLAIN is not supported for {connection.vendor}')
+
+
+def _clauses(sql, keyword):
+    """The text of every ``keyword`` clause in ``sql`` (subqueries included), each up to the next clause"""
+    clauses = []
+    for match in re.finditer(rf'\b{keyword}\b', sql, re.IGNORECASE):
+        clause = sql[match.end():]
+        end = CLAUSE_END.search(clause)
+        clauses.append(clause[:end.start()] if end else clause)
+    return ' '.join(clauses)
+
+
+def index_columns(sql, table):
+    """
+    Columns of ``table`` an index would need to serve ``sql``: WHERE
+    equalities, then either the WHERE ranges or, if there are none, the
+    ORDER BY columns, so the index can also return rows already sorted.
+    """
+    equalities, ranges = [], []
+    for qualifier, column, operator in COMPARISON.findall(_clauses(sql, 'WHERE')):
+        if qualifier != table:
+            continue
+        target = equalities if operator.upper() in EQUALITY_OPERATORS else ranges
+        if column not in equalities and column not in ranges:
+            target.append(column)
+    if not ranges:
+        ranges = [
+            column for qualifier, column in ORDER_COLUMN.findall(_clauses(sql, 'ORDER BY'))
+            if qualifier == table and column not in equalities
+        ]
+    return equalities + list(dict.fromkeys(ranges))
+
+
+def table_indexes(connection, table):
+    """Column lists of the indexes (including keys) on ``table``"""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [info['columns'] for info in constraints.values() if info['index'] or info['unique'] or info['primary_key']]
+
+
+def existing_index(connection, table, columns):
+    """Columns of an index on ``table`` that starts with the leading filtered column, if any"""
+    for indexed in table_indexes(connection, table):
+        if indexed and indexed[0] == columns[0]:
+            return indexed
+    return None
+
+
+def suggest_index(connection, table, columns):
+    """
+    The (table, columns) index to add for a full scan of ``table`` filtered
+    on ``columns``, or None if nothing is filtered, ``table`` is a subquery
+    alias, or a usable index exists and the planner just didn't choose it.
+    """
+    if not columns or table not in connection.introspection.table_names():
+        return None
+    if existing_index(connection, table, columns):
+        return None
+    return (table, tuple(columns))
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the benchmark workload in-process while logging every SQL statement, EXPLAIN the slowest '
+        'ones and report full table scans, sorts and the indexes that would avoid them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5, help='Requests per endpoint in the workload')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only these route names (repeatable)')
+        parser.add_argument('--writes', action='store_true',
+                            help='Include POST endpoints; they create users, tokens, announcements and grades')
+        parser.add_argument('--password', default='Campus@123', help="The generated users' password, for login")
+        parser.add_argument('--top', type=int, default=20, help='How many of the slowest statements to EXPLAIN')
+        parser.add_argument('--save-log', metavar='PATH', help='Also write the captured query log to PATH (JSON lines)')
+        parser.add_argument('--log', metavar='PATH',
+                            help='Analyze a log written by --save-log instead of running the workload')
+
+    def handle(self, *args, **options):
+        if options['log']:
+            entries = self._read_log(options['log'])
+        else:
+            entries = self._run_workload(options)
+        if options['save_log']:
+            with open(options['save_log'], 'w') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, cls=DjangoJSONEncoder) + '\n')
+            self.stdout.write(f"Query log saved to {options['save_log']}")
+
+        statements = group_statements(entries)
+        total = sum(entry['seconds'] for entry in entries)
+        self.stdout.write(
+            f'Captured {len(entries)} statement(s), {len(statements)} distinct, {total * 1000:.1f} ms in SQL')
+
+        missing = defaultdict(set)  # (table, columns) -> workload steps
+        explained = 0
+        for statement in statements:
+            if explained >= options['top']:
+                break
+            if statement['params'] is None or not statement['sql'].lstrip().upper().startswith('SELECT'):
+                continue
+            explained += 1
+            connection = connections[statement['alias']]
+            try:
+                problems = explain(connection, statement['sql'], statement['params'])
+            except DatabaseError as e:
+                problems = []
+                self.stderr.write(f'Could not EXPLAIN statement {explained}: {e}')
+
+            self.stdout.write(
+                f"\n{explained}. {statement['count']} x, {statement['seconds'] * 1000:.1f} ms total, "
+                f"{statement['max_seconds'] * 1000:.1f} ms max  [{', '.join(sorted(statement['labels'])) or '-'}]"
+            )
+            self.stdout.write(f"   {self._shorten(statement['sql'])}")
+            for table, problem in dict.fromkeys(problems):
+                self.stdout.write(f'   {problem} of {table}')
+                if problem != 'full scan':
+                    continue
+                columns = index_columns(statement['sql'], table)
+                suggestion = suggest_index(connection, table, columns)
+                if suggestion:
+                    missing[suggestion].update(statement['labels'] or {'-'})
+                elif columns and table in connection.introspection.table_names():
+                    indexed = existing_index(connection, table, columns)
+                    self.stdout.write(f"   index on {table}({', '.join(indexed)}) exists but wasn't used "
+                                      f"for {', '.join(columns)}")
+
+        self.stdout.write('')
+        if not missing:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found'))
+            return
+        self.stdout.write(self.style.WARNING('Missing indexes:'))
+        for (table, columns), labels in sorted(missing.items()):
+            self.stdout.write(f"  {table}({', '.join(columns)})  used by {', '.join(sorted(labels))}")
+
+    def _run_workload(self, options):
+        scenarios = build_scenarios(load_fixtures(), options['password'])
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f'Unknown endpoint(s): {", ".join(sorted(unknown))}')
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['endpoints']]
+        elif not options['writes']:
+            scenarios = [scenario for scenario in scenarios if not scenario.write]
+
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host, raise_request_exception=False)
+        entries = []
+        logs = [QueryLog(connection.alias, entries) for connection in connections.all()]
+        with ExitStack() as stack:
+            for connection, log in zip(connections.all(), logs):
+                stack.enter_context(connection.execute_wrapper(log))
+            for scenario in scenarios:
+                for log in logs:
+                    log.label = scenario.name
+                for _ in range(options['requests']):
+                    self._request(client, scenario)
+        return entries
+
+    def _request(self, client, scenario):
+        path, body, headers = scenario.build()
+        headers = dict(headers)
+        content_type = headers.pop('Content-Type', 'application/octet-stream')
+        response = client.generic(scenario.method, path, data=body or b'', content_type=content_type, headers=headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        if response.status_code >= 400:
+            self.stderr.write(f'{scenario.name}: HTTP {response.status_code}')
+
+    def _read_log(self, path):
+        try:
+            with open(path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read query log: {e}')
+
+    def _shorten(self, sql, limit=240):
+        sql = ' '.join(sql.split())
+        return sql if len(sql) <= limit else sql[:limit] + ' ...'
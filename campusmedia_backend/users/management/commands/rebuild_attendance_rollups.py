@@ -0,0 +1,65 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from users.academic import term_for_month
+from users.models import Attendance, AttendanceArchive, AttendanceRollup, Class
+from users.rollups import STATUS_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Rebuild attendance rollups from the attendance and attendance archive tables, a batch of classes at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class-id', type=int, action='append', dest='class_ids',
+                            help='Only rebuild these classes (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Classes rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        class_ids = options['class_ids'] or list(Class.objects.order_by('pk').values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        rebuilt = 0
+
+        for start in range(0, len(class_ids), batch_size):
+            batch = class_ids[start:start + batch_size]
+            with transaction.atomic():
+                # Lock the classes so roll calls can't interleave with the rebuild
+                list(Class.objects.select_for_update().filter(pk__in=batch).values_list('pk', flat=True))
+                rows = self._rollup_rows(batch)
+                AttendanceRollup.objects.filter(class_attended_id__in=batch).delete()
+                AttendanceRollup.objects.bulk_create(rows, batch_size=1000)
+            rebuilt += len(rows)
+            self.stdout.write(f'Rebuilt {len(rows)} rollup(s) for {len(batch)} class(es)')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {rebuilt} rollup row(s) across {len(class_ids)} class(es)'))
+
+    def _rollup_rows(self, class_ids):
+        # Group by calendar month in SQL; terms are whole months, so months
+        # fold into terms exactly without reading individual rows. Archived
+        # years still count towards their terms.
+        counts = defaultdict(Counter)
+        for model in (Attendance, AttendanceArchive):
+            monthly = (
+                model.objects
+                .filter(class_attended_id__in=class_ids)
+                .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+                .values('student_id', 'class_attended_id', 'year', 'month', 'status')
+                .annotate(n=Count('id'))
+                .order_by()
+            )
+            for row in monthly:
+                key = (row['student_id'], row['class_attended_id'], term_for_month(row['year'], row['month']))
+                counts[key][row['status']] += row['n']
+
+        return [
+            AttendanceRollup(
+                student_id=student_id,
+                class_attended_id=class_id,
+                term=term,
+                **{field: counter.get(status, 0) for status, field in STATUS_FIELDS.items()},
+            )
+            for (student_id, class_id, term), counter in counts.items()
+        ]
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import User, UserSearchPrefix
+from users.typeahead import index_users
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the typeahead prefix index for all users from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Users read per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            UserSearchPrefix.objects.all().delete()
+
+        rows = User.objects.order_by('pk').values_list('id', 'first_name', 'last_name', 'email', 'register_number')
+        last_pk = 0
+        indexed = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:batch_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                index_users(chunk)
+            indexed += len(chunk)
+            last_pk = chunk[-1][0]
+            self.stdout.write(f'Indexed {indexed} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {indexed} user(s)'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from users.models import Class, ClassEnrollment
+
+
+class Command(BaseCommand):
+    help = 'Recount Class.student_count from class enrollments and fix any drift, a batch of classes at a time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Classes checked per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        last_pk = 0
+        checked = fixed = 0
+
+        while True:
+            with transaction.atomic():
+                # Locking the batch keeps enrollments from moving under the recount
+                classes = Class.objects.order_by('pk').filter(pk__gt=last_pk)
+                if not dry_run:
+                    classes = classes.select_for_update()
+                stored = dict(classes.values_list('pk', 'student_count')[:batch_size])
+                if not stored:
+                    break
+                actual = dict(
+                    ClassEnrollment.objects.filter(class_enrolled_id__in=stored)
+                    .values_list('class_enrolled_id')
+                    .annotate(n=Count('id'))
+                    .order_by()
+                )
+                for pk, count in stored.items():
+                    correct = actual.get(pk, 0)
+                    if count == correct:
+                        continue
+                    fixed += 1
+                    self.stdout.write(f'Class {pk}: student_count {count} -> {correct}')
+                    if not dry_run:
+                        Class.objects.filter(pk=pk).update(student_count=correct)
+            checked += len(stored)
+            last_pk = max(stored)
+
+        verb = 'would fix' if dry_run else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'Done: checked {checked} class(es), {verb} {fixed}'))
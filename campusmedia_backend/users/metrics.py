@@ -0,0 +1,360 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from campusmedia_backend.mysql_pool.pool import pool_stats
+
+from .throttling import get_login_throttle
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency by route', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('Response body size by route (non-streaming responses)', SIZE_BUCKETS),
+    'db_queries_per_request': ('SQL queries issued per request by route', QUERY_COUNT_BUCKETS),
+}
+COUNTERS = {
+    'http_requests_total': 'Requests by route and status code',
+    'db_query_duration_seconds_total': 'Time spent in SQL queries by route',
+    'login_throttle_rejections_total': 'Login attempts rejected by the throttle',
+    'db_pool_waits_total': 'Connection checkouts that had to wait for a pooled connection',
+    'db_pool_wait_seconds_total': 'Time spent waiting for a pooled connection',
+    'db_pool_timeouts_total': 'Connection checkouts that gave up waiting',
+}
+# Point-in-time values. Across processes they are summed, skipping workers that have exited.
+GAUGES = {
+    'db_pool_connections': 'Open pooled database connections by state (idle, in_use)',
+    'db_pool_max_size': 'Pooled database connections allowed',
+    'db_pool_waiting': 'Requests waiting for a pooled database connection',
+}
+UNMATCHED_ROUTE = '<unmatched>'  # 404s share one label so bad URLs can't blow up cardinality
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms for one worker process.
+
+    Series are keyed by (metric name, sorted label pairs). Histograms keep
+    per-bucket (non-cumulative) counts plus sum and count, so registries
+    from several processes merge by plain addition.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = value
+
+    def set_gauge(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [[0] * (len(buckets) + 1), 0, 0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def dump(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                'histograms': [
+                    [name, list(labels), list(series[0]), series[1], series[2]]
+                    for (name, labels), series in self.histograms.items()
+                ],
+            }
+
+    def merge(self, data, gauges=True):
+        """Add a dump() from another process into this registry"""
+        with self._lock:
+            for name, labels, value in data.get('counters', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, value in data.get('gauges', []) if gauges else []:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self.gauges[key] = self.gauges.get(key, 0) + value
+            for name, labels, buckets, total, count in data.get('histograms', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                series = self.histograms.get(key)
+                if series is None:
+                    self.histograms[key] = [list(buckets), total, count]
+                else:
+                    series[0] = [a + b for a, b in zip(series[0], buckets)]
+                    series[1] += total
+                    series[2] += count
+
+
+registry = MetricsRegistry()
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _metrics_path():
+    return os.path.join(settings.METRICS_DIR, f'metrics-{os.getpid()}.json')
+
+
+def _record_throttle_stats():
+    stats = get_login_throttle().stats()
+    registry.set('login_throttle_rejections_total', {'scope': 'account'}, stats['rejected_account'])
+    registry.set('login_throttle_rejections_total', {'scope': 'ip'}, stats['rejected_ip'])
+
+
+def _record_pool_stats():
+    for alias, stats in pool_stats().items():
+        labels = {'alias': alias}
+        registry.set('db_pool_waits_total', labels, stats['waits'])
+        registry.set('db_pool_wait_seconds_total', labels, stats['wait_seconds'])
+        registry.set('db_pool_timeouts_total', labels, stats['timeouts'])
+        registry.set_gauge('db_pool_connections', {**labels, 'state': 'idle'}, stats['idle'])
+        registry.set_gauge('db_pool_connections', {**labels, 'state': 'in_use'}, stats['in_use'])
+        registry.set_gauge('db_pool_max_size', labels, stats['max_size'])
+        registry.set_gauge('db_pool_waiting', labels, stats['waiting'])
+
+
+def _record_stats():
+    _record_throttle_stats()
+    _record_pool_stats()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def flush(force=False):
+    """
+    Write this process's registry to METRICS_DIR, at most once per
+    METRICS_FLUSH_INTERVAL seconds unless forced. Each process owns one
+    file, replaced atomically, so readers never see a partial write.
+    """
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return  # another thread is already writing
+    try:
+        _last_flush = now
+        _record_stats()
+        path = _metrics_path()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(registry.dump(), f)
+        os.replace(tmp_path, path)
+    finally:
+        _flush_lock.release()
+
+
+def collect():
+    """
+    The registry to expose: this process's own when METRICS_DIR is unset,
+    otherwise the sum over every process's file. Files from exited workers
+    are kept so counters don't go backwards when a worker is recycled, but
+    their gauges no longer count.
+    """
+    if not settings.METRICS_DIR:
+        _record_stats()
+        return registry
+    flush(force=True)
+    combined = MetricsRegistry()
+    for name in os.listdir(settings.METRICS_DIR):
+        if not (name.startswith('metrics-') and name.endswith('.json')):
+            continue
+        try:
+            pid = int(name[len('metrics-'):-len('.json')])
+            with open(os.path.join(settings.METRICS_DIR, name)) as f:
+                combined.merge(json.load(f), gauges=_pid_alive(pid))
+        except (OSError, ValueError):
+            continue  # removed or replaced while we listed the directory
+    return combined
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def render(metrics):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name, help_text in COUNTERS.items():
+        series = sorted((labels, value) for (metric, labels), value in metrics.counters.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        lines.extend(f'{name}{_format_labels(labels)} {value}' for labels, value in series)
+
+    for name, help_text in GAUGES.items():
+        series = sorted((labels, value) for (metric, labels), value in metrics.gauges.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.extend(f'{name}{_format_labels(labels)} {value}' for labels, value in series)
+
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        series = sorted((labels, data) for (metric, labels), data in metrics.histograms.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, (buckets, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds + ('+Inf',), buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+# The current request's _QueryTimer. sync_to_async runs views on a worker
+# thread with its own connections but a copy of this context, so queries are
+# charged through the var rather than a wrapper installed per request.
+_query_timer = ContextVar('query_timer', default=None)
+
+
+class _QueryTimer:
+    """Count and total duration of the SQL queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def _time_query(execute, sql, params, many, context):
+    """connection.execute_wrapper hook charging every query to the current request's timer"""
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - start
+        timer.count += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Fires again on reconnect, but the wrapper list lives on the connection handle
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, response size, and SQL query count and time
+    for every request, labelled by method and URL route pattern
+    (e.g. api/users/<int:user_id>/). Put it first in MIDDLEWARE so the
+    timing covers the rest of the stack. Works under WSGI and ASGI; under
+    ASGI it stays async, so async views aren't pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        token = _query_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        self._record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        timer = _QueryTimer()
+        token = _query_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        self._record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, timer, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        labels = {'method': request.method, 'route': match.route if match else UNMATCHED_ROUTE}
+        registry.inc('http_requests_total', {**labels, 'status': str(response.status_code)})
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        registry.observe('db_queries_per_request', labels, timer.count)
+        registry.inc('db_query_duration_seconds_total', labels, timer.duration)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content))
+        flush()
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint
+    GET /metrics
+
+    If METRICS_TOKEN is set, the scraper must send it as a Bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden('Forbidden\n')
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
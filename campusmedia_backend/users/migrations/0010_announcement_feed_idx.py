@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+def blank_target_role_to_null(apps, schema_editor):
+    Announcement = apps.get_model('users', 'Announcement')
+    Announcement.objects.filter(target_role='').update(target_role=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_authtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_target_role_to_null, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['is_active', 'target_role', 'created_at'], name='announcement_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE announcements ADD FULLTEXT INDEX announcement_fulltext (title, content)'
+        )
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE announcements_fts USING fts5(title, content)'
+        )
+        schema_editor.execute(
+            'INSERT INTO announcements_fts (rowid, title, content) '
+            'SELECT id, title, content FROM announcements'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE announcements DROP INDEX announcement_fulltext')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE announcements_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_announcement_feed_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_prefix_index(apps, schema_editor):
+    from users.typeahead import prefixes_for
+
+    User = apps.get_model('users', 'User')
+    UserSearchPrefix = apps.get_model('users', 'UserSearchPrefix')
+    rows = User.objects.values_list('id', 'first_name', 'last_name', 'email', 'register_number')
+    batch = []
+    for user_id, *fields in rows.iterator(chunk_size=2000):
+        batch.extend(UserSearchPrefix(user_id=user_id, prefix=prefix) for prefix in prefixes_for(*fields))
+        if len(batch) >= 5000:
+            UserSearchPrefix.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        UserSearchPrefix.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_announcement_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchPrefix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=20)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_prefixes', to='users.user')),
+            ],
+            options={
+                'verbose_name': 'User Search Prefix',
+                'verbose_name_plural': 'User Search Prefixes',
+                'db_table': 'user_search_prefixes',
+                'unique_together': {('prefix', 'user')},
+            },
+        ),
+        migrations.RunPython(build_prefix_index, migrations.RunPython.noop),
+    ]
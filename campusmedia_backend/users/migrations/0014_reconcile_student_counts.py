@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def recount_students(apps, schema_editor):
+    # Nothing maintained student_count before; start from the real numbers
+    Class = apps.get_model('users', 'Class')
+    ClassEnrollment = apps.get_model('users', 'ClassEnrollment')
+    enrolled = (
+        ClassEnrollment.objects.filter(class_enrolled=OuterRef('pk'))
+        .values('class_enrolled')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    Class.objects.update(student_count=Coalesce(Subquery(enrolled), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_attendancerollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_students, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_reconcile_student_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAcademicYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_year', models.IntegerField(help_text='e.g., 2024 for 2024-25', unique=True)),
+                ('label', models.CharField(max_length=7)),
+                ('status', models.CharField(choices=[('archiving', 'Archiving'), ('archived', 'Archived')], default='archiving', max_length=10)),
+                ('attendance_rows', models.IntegerField(default=0)),
+                ('grade_rows', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Academic Year',
+                'verbose_name_plural': 'Archived Academic Years',
+                'db_table': 'archived_academic_years',
+                'ordering': ['start_year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('Present', 'Present'), ('Absent', 'Absent'), ('Late', 'Late'), ('Excused', 'Excused')], max_length=20)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('academic_year', models.CharField(help_text='e.g., 2024-25', max_length=7)),
+                ('class_attended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance', to='users.class')),
+                ('marked_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.user')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance', to='users.user')),
+            ],
+            options={
+                'verbose_name': 'Archived Attendance',
+                'verbose_name_plural': 'Archived Attendance Records',
+                'db_table': 'attendance_archive',
+                'indexes': [models.Index(fields=['academic_year', 'date'], name='attendance_archive_year_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('assignment_name', models.CharField(max_length=255)),
+                ('score', models.IntegerField()),
+                ('grade_letter', models.CharField(choices=[('A', 'A (90-100)'), ('B', 'B (80-89)'), ('C', 'C (70-79)'), ('D', 'D (60-69)'), ('F', 'F (Below 60)')], max_length=1)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('academic_year', models.CharField(help_text='e.g., 2024-25', max_length=7)),
+                ('class_graded', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_grades', to='users.class')),
+                ('graded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.user')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_grades', to='users.user')),
+            ],
+            options={
+                'verbose_name': 'Archived Grade',
+                'verbose_name_plural': 'Archived Grades',
+                'db_table': 'grades_archive',
+                'indexes': [models.Index(fields=['academic_year', 'created_at'], name='grades_archive_year_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+from bisect import bisect_right
+
 from django.db import models
 from django.contrib.auth.hashers import make_password, check_password
 
@@ -45,13 +47,20 @@ class User(models.Model):
         ordering = ['-created_at']
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # User list/export filters: equality on role/is_active, keyset range on created_at
+            models.Index(fields=['role', 'is_active', 'created_at'], name='user_role_active_idx'),
+            # Unfiltered list pages in (-created_at, -id) order; the primary key rides along in the index
+            models.Index(fields=['created_at'], name='user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.register_number})"
     
-    def save(self, *args, **kwargs):
-        # Hash password before saving if it's not already hashed
-        if self.pk is None or not self.password.startswith('pbkdf2_'):
+    def save(self, *args, hash_password=True, **kwargs):
+        # Hash password before saving if it's not already hashed. Callers that
+        # hashed it themselves (e.g. off the event loop) pass hash_password=False.
+        if hash_password and (self.pk is None or not self.password.startswith('pbkdf2_')):
             self.password = make_password(self.password)
         super().save(*args, **kwargs)
     
@@ -134,9 +143,73 @@ class Attendance(models.Model):
         unique_together = ['student', 'class_attended', 'date']
         verbose_name = 'Attendance'
         verbose_name_plural = 'Attendance Records'
+        indexes = [
+            # A class's roll call for one day; the unique key leads with student
+            models.Index(fields=['class_attended', 'date'], name='attendance_class_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.class_attended.class_name} - {self.date} - {self.status}"
+    
+    # Columns rollup_state() reads, in its order
+    ROLLUP_FIELDS = ('student_id', 'class_attended_id', 'date', 'status')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so rollups can be adjusted when it changes.
+        # With only()/defer() reading a missing field would load the row
+        # again through from_db; the signals fetch the snapshot instead.
+        if set(cls.ROLLUP_FIELDS) <= set(field_names):
+            instance._rollup_state = instance.rollup_state()
+        return instance
+    
+    def rollup_state(self):
+        """The (student, class, date, status) this row contributes to AttendanceRollup"""
+        if self.student_id is None or self.class_attended_id is None or self.date is None:
+            return None
+        # date may still be the string it was assigned from
+        date = self._meta.get_field('date').to_python(self.date)
+        return (self.student_id, self.class_attended_id, date, self.status)
+
+
+class AttendanceRollup(models.Model):
+    """
+    Running attendance counts per student, class and term, kept in step with
+    Attendance so percentages are a single-row lookup.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_rollups', limit_choices_to={'role': 'Student'})
+    class_attended = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='attendance_rollups')
+    term = models.CharField(max_length=20, help_text="e.g., 2025-26/T1")
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    excused = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'attendance_rollups'
+        unique_together = ['student', 'class_attended', 'term']
+        verbose_name = 'Attendance Rollup'
+        verbose_name_plural = 'Attendance Rollups'
+    
+    def __str__(self):
+        return f"{self.student_id} - {self.class_attended_id} - {self.term}: {self.attendance_percentage}%"
+    
+    @property
+    def total(self):
+        return self.present + self.absent + self.late + self.excused
+    
+    @property
+    def attendance_percentage(self):
+        """
+        Share of non-excused sessions attended (Present or Late), or None
+        if there is nothing to count yet
+        """
+        counted = self.present + self.absent + self.late
+        if counted <= 0:
+            return None
+        return round((self.present + self.late) * 100 / counted, 1)
 
 
 class Grade(models.Model):
@@ -166,25 +239,118 @@ class Grade(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Grade'
         verbose_name_plural = 'Grades'
+        indexes = [
+            # A student's grades per class (dashboard averages, grade import lookups)
+            models.Index(fields=['student', 'class_graded'], name='grade_student_class_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.class_graded.class_name} - {self.assignment_name} - {self.grade_letter}"
     
+    # Minimum score for each letter above F, ascending; matches GRADE_CHOICES
+    LETTER_CUTOFFS = [60, 70, 80, 90]
+    LETTERS = 'FDCBA'
+    
+    @classmethod
+    def letter_for_score(cls, score):
+        return cls.LETTERS[bisect_right(cls.LETTER_CUTOFFS, score)]
+    
+    @classmethod
+    def letters_for_scores(cls, scores):
+        """Letters for a whole batch of scores, e.g. before bulk_create (which skips save())"""
+        cutoffs, letters = cls.LETTER_CUTOFFS, cls.LETTERS
+        return [letters[bisect_right(cutoffs, score)] for score in scores]
+    
     def save(self, *args, **kwargs):
         # Auto-calculate grade letter based on score
-        if self.score >= 90:
-            self.grade_letter = 'A'
-        elif self.score >= 80:
-            self.grade_letter = 'B'
-        elif self.score >= 70:
-            self.grade_letter = 'C'
-        elif self.score >= 60:
-            self.grade_letter = 'D'
-        else:
-            self.grade_letter = 'F'
+        self.grade_letter = self.letter_for_score(self.score)
         super().save(*args, **kwargs)
 
 
+class ArchivedAcademicYear(models.Model):
+    """
+    A closed academic year whose attendance and grades have been (or are
+    being) moved into the archive tables by ``archive_academic_year``.
+    """
+    STATUS_CHOICES = [
+        ('archiving', 'Archiving'),
+        ('archived', 'Archived'),
+    ]
+
+    start_year = models.IntegerField(unique=True, help_text="e.g., 2024 for 2024-25")
+    label = models.CharField(max_length=7)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='archiving')
+    attendance_rows = models.IntegerField(default=0)
+    grade_rows = models.IntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'archived_academic_years'
+        ordering = ['start_year']
+        verbose_name = 'Archived Academic Year'
+        verbose_name_plural = 'Archived Academic Years'
+
+    def __str__(self):
+        return f"{self.label} ({self.status})"
+
+
+class AttendanceArchive(models.Model):
+    """
+    Attendance from closed academic years, out of the hot table. Rows keep
+    their original ids; ``academic_year`` is the year they were moved with.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_attendance')
+    class_attended = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='archived_attendance')
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Attendance.STATUS_CHOICES)
+    marked_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    remarks = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    academic_year = models.CharField(max_length=7, help_text="e.g., 2024-25")
+
+    class Meta:
+        db_table = 'attendance_archive'
+        verbose_name = 'Archived Attendance'
+        verbose_name_plural = 'Archived Attendance Records'
+        indexes = [
+            models.Index(fields=['academic_year', 'date'], name='attendance_archive_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.class_attended_id} - {self.date} - {self.status}"
+
+
+class GradeArchive(models.Model):
+    """
+    Grades from closed academic years, out of the hot table. Rows keep
+    their original ids; ``academic_year`` is the year they were moved with.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_grades')
+    class_graded = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='archived_grades')
+    assignment_name = models.CharField(max_length=255)
+    score = models.IntegerField()
+    grade_letter = models.CharField(max_length=1, choices=Grade.GRADE_CHOICES)
+    graded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    remarks = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    academic_year = models.CharField(max_length=7, help_text="e.g., 2024-25")
+
+    class Meta:
+        db_table = 'grades_archive'
+        verbose_name = 'Archived Grade'
+        verbose_name_plural = 'Archived Grades'
+        indexes = [
+            models.Index(fields=['academic_year', 'created_at'], name='grades_archive_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.class_graded_id} - {self.assignment_name} - {self.grade_letter}"
+
+
 class Announcement(models.Model):
     """
     Announcements created by staff/principal
@@ -202,6 +368,52 @@ class Announcement(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Announcement'
         verbose_name_plural = 'Announcements'
+        indexes = [
+            # Role-targeted feed: equality on is_active/target_role, range on created_at
+            models.Index(fields=['is_active', 'target_role', 'created_at'], name='announcement_feed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.created_by.get_full_name()}"
+    
+    def save(self, *args, **kwargs):
+        # Store "all users" as NULL only, so the feed has a single global bucket
+        if not self.target_role:
+            self.target_role = None
+        super().save(*args, **kwargs)
+
+
+class AuthToken(models.Model):
+    """
+    Access tokens issued at login. Only a SHA-256 digest of the key is stored.
+    """
+    key_digest = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'auth_tokens'
+        verbose_name = 'Auth Token'
+        verbose_name_plural = 'Auth Tokens'
+    
+    def __str__(self):
+        return f"Token for {self.user.get_full_name()} (expires {self.expires_at})"
+
+
+class UserSearchPrefix(models.Model):
+    """
+    Precomputed, normalized prefixes of a user's names, email and register
+    number. Typeahead search is an exact lookup on ``prefix``.
+    """
+    prefix = models.CharField(max_length=20)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_prefixes')
+    
+    class Meta:
+        db_table = 'user_search_prefixes'
+        unique_together = ['prefix', 'user']
+        verbose_name = 'User Search Prefix'
+        verbose_name_plural = 'User Search Prefixes'
+    
+    def __str__(self):
+        return f"{self.prefix} -> {self.user_id}"
@@ -0,0 +1,208 @@
+import codecs
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .hashing import get_password_executor
+from .models import User
+from .typeahead import index_users
+
+
+PROVISION_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 200
+REQUIRED_FIELDS = ('first_name', 'last_name', 'email', 'register_number', 'phone', 'role', 'password')
+OPTIONAL_FIELDS = (
+    'student_class', 'stream', 'year', 'department',
+    'qualification', 'subject_expertise', 'assigned_classes', 'experience_years',
+)
+
+
+class ProvisioningError(ValueError):
+    """Raised when a roster can't be read at all"""
+
+
+def read_roster(fileobj, filename):
+    """
+    Yield one dict per user from a CSV (header row of field names) or a
+    JSON roster (a list of objects, or {"users": [...]}).
+    """
+    if filename.lower().endswith('.json'):
+        try:
+            data = json.load(codecs.getreader('utf-8-sig')(fileobj))
+        except (UnicodeDecodeError, ValueError) as e:
+            raise ProvisioningError(f'Could not read JSON roster: {e}')
+        return iter_roster_list(data)
+    return _csv_roster(codecs.iterdecode(fileobj, 'utf-8-sig'))
+
+
+def iter_roster_list(data):
+    if isinstance(data, dict):
+        data = data.get('users')
+    if not isinstance(data, list):
+        raise ProvisioningError('Roster must be a list of users or {"users": [...]}')
+    return iter(data)
+
+
+def _csv_roster(lines):
+    reader = csv.DictReader(lines)
+    try:
+        header = [name.strip().lower() for name in reader.fieldnames or []]
+        missing = [name for name in REQUIRED_FIELDS if name not in header]
+        if missing:
+            raise ProvisioningError(f'Missing column(s): {", ".join(missing)}')
+        reader.fieldnames = header
+        for row in reader:
+            if any(row.values()):
+                yield row
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ProvisioningError(f'Could not read CSV roster: {e}')
+
+
+def _clean_row(row):
+    """Build an unsaved User from a roster row, or raise ValidationError"""
+    if not isinstance(row, dict):
+        raise ValidationError('Each user must be an object')
+    fields = {}
+    for name in REQUIRED_FIELDS + OPTIONAL_FIELDS:
+        value = row.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ''):
+            fields[name] = value
+    user = User(**fields)
+    # Field checks only (lengths, choices, email format); uniqueness is
+    # checked against prefetched sets for the whole chunk instead
+    user.full_clean(validate_unique=False)
+    return user
+
+
+def _init_hash_worker(settings_module):
+    # Needed where workers are spawned rather than forked (Windows, macOS)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def get_hash_pool():
+    """
+    A process pool for make_password sized by PASSWORD_HASH_PROCESSES
+    (0 = all cores), for the provision_users command. Web requests use the
+    shared thread pool instead of starting processes each time.
+    """
+    return ProcessPoolExecutor(
+        max_workers=settings.PASSWORD_HASH_PROCESSES or os.cpu_count(),
+        initializer=_init_hash_worker,
+        initargs=(settings.SETTINGS_MODULE,),
+    )
+
+
+def _insert_chunk(users, report):
+    """
+    Insert one chunk in a single transaction. If another request claimed an
+    email or register number since the chunk was checked, redo the chunk one
+    row at a time so only the clashing rows are reported.
+    Returns the users that were inserted.
+    """
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([user for _, user in users])
+        return [user for _, user in users]
+    except IntegrityError:
+        pass
+
+    inserted = []
+    for line, user in users:
+        user.pk = None
+        try:
+            with transaction.atomic():
+                user.save(hash_password=False)
+        except IntegrityError:
+            report.reject(line, user.email, 'Email or register number already registered')
+        else:
+            inserted.append(user)
+    return inserted
+
+
+class _Report(dict):
+    def __init__(self):
+        super().__init__(created=0, skipped=0, errors=[])
+
+    def reject(self, line, email, message):
+        self['skipped'] += 1
+        if len(self['errors']) < MAX_REPORTED_ERRORS:
+            self['errors'].append({'row': line, 'email': email, 'message': message})
+
+
+def provision_users(rows, chunk_size=PROVISION_CHUNK_SIZE, dry_run=False, executor=None):
+    """
+    Create users in bulk from roster rows (see ``read_roster``).
+
+    Rows are validated and checked for email/register_number clashes with
+    existing users and earlier rows, a chunk at a time. Passwords for each
+    chunk are hashed on ``executor`` (by default the process-wide password
+    thread pool), then the chunk is inserted in one transaction. Invalid
+    rows are skipped and reported; the rest are created. With ``dry_run``
+    nothing is hashed or written.
+
+    Returns {'created', 'skipped', 'errors': [{'row', 'email', 'message'}]}.
+    """
+    report = _Report()
+    seen_emails, seen_register_numbers = set(), set()
+    # 'row' in the report is the user's 1-based position in the roster
+    numbered = enumerate(rows, start=1)
+    executor = executor or get_password_executor()
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for line, row in chunk:
+            try:
+                user = _clean_row(row)
+            except ValidationError as e:
+                email = row.get('email') if isinstance(row, dict) else None
+                messages = e.message_dict if hasattr(e, 'error_dict') else {'row': e.messages}
+                report.reject(line, email, '; '.join(
+                    f'{field}: {" ".join(errors)}' for field, errors in messages.items()
+                ))
+                continue
+            valid.append((line, user))
+
+        taken_emails = set(User.objects.filter(
+            email__in=[user.email for _, user in valid]).values_list('email', flat=True))
+        taken_register_numbers = set(User.objects.filter(
+            register_number__in=[user.register_number for _, user in valid]).values_list('register_number', flat=True))
+        batch = []
+        for line, user in valid:
+            if user.email in taken_emails or user.email in seen_emails:
+                report.reject(line, user.email, 'Email already registered')
+            elif user.register_number in taken_register_numbers or user.register_number in seen_register_numbers:
+                report.reject(line, user.email, 'Register number already registered')
+            else:
+                seen_emails.add(user.email)
+                seen_register_numbers.add(user.register_number)
+                batch.append((line, user))
+
+        if dry_run or not batch:
+            report['created'] += len(batch)
+            continue
+
+        hashes = executor.map(make_password, [user.password for _, user in batch], chunksize=8)
+        for (_, user), hashed in zip(batch, hashes):
+            user.password = hashed
+        inserted = _insert_chunk(batch, report)
+        report['created'] += len(inserted)
+
+        # bulk_create skips post_save, so add the new users to the typeahead index here
+        index_users(User.objects.filter(email__in=[user.email for user in inserted]).values_list(
+            'id', 'first_name', 'last_name', 'email', 'register_number'))
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
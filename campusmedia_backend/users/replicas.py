@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .authentication import get_token_key
+from .throttling import get_forwarded_ip
+
+
+logger = logging.getLogger(__name__)
+
+PIN_CACHE_PREFIX = 'replica-pin:'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Database alias reads go to for the current request; None means the primary.
+# A ContextVar rather than a thread-local so it also follows ASGI requests
+# across sync_to_async/async_to_sync hops.
+_read_alias = ContextVar('read_alias', default=None)
+
+_health = {}  # alias -> (healthy, checked_at)
+_health_lock = threading.Lock()
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica ReplicaMiddleware picked for this request and
+    everything else to the primary. Querysets used for writing, such as
+    select_for_update() and get_or_create(), are routed as writes by Django.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+@contextmanager
+def read_from_primary():
+    """Force reads in this block onto the primary, e.g. right after a write"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind its source, or None if replication is
+    broken. A server that isn't replicating from anything counts as current,
+    which lets two independent local databases stand in for a primary and
+    a replica during development.
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'mysql':
+            cursor.execute('SELECT 1')
+            return 0
+        try:
+            cursor.execute('SHOW REPLICA STATUS')  # MySQL 8.0.22+
+            column = 'Seconds_Behind_Source'
+        except DatabaseError:
+            cursor.execute('SHOW SLAVE STATUS')
+            column = 'Seconds_Behind_Master'
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        columns = [description[0] for description in cursor.description]
+        return dict(zip(columns, row)).get(column)
+
+
+def _check(alias):
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError as e:
+        logger.warning('Replica %s unreachable, reading from the primary: %s', alias, e)
+        return False
+    if lag is None or lag > settings.REPLICA_MAX_LAG:
+        logger.warning('Replica %s lag is %s, reading from the primary', alias, lag)
+        return False
+    return True
+
+
+def healthy_replicas():
+    """
+    Configured replicas that answered and were within REPLICA_MAX_LAG at
+    their last check. Each replica is re-checked at most every
+    REPLICA_HEALTH_INTERVAL seconds per process, by whichever request
+    finds its result stale first.
+    """
+    now = time.monotonic()
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        with _health_lock:
+            ok, checked_at = _health.get(alias, (False, None))
+            stale = checked_at is None or now - checked_at >= settings.REPLICA_HEALTH_INTERVAL
+            if stale:
+                # Claim the check so concurrent requests keep the old answer meanwhile
+                _health[alias] = (ok, now)
+        if stale:
+            ok = _check(alias)
+            with _health_lock:
+                _health[alias] = (ok, now)
+        if ok:
+            healthy.append(alias)
+    return healthy
+
+
+def reset_replica_health():
+    """Forget health results so the next request re-checks every replica (for tests)"""
+    with _health_lock:
+        _health.clear()
+
+
+def _client_keys(request):
+    # Not REMOTE_ADDR: behind the proxy or a campus NAT everyone shares it, and
+    # one write would pin them all to the primary
+    clients = []
+    key = get_token_key(request)
+    if key:
+        clients.append(f'token:{key}')
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        clients.append(f'session:{session}')
+    if not clients:
+        forwarded = get_forwarded_ip(request)
+        if forwarded:
+            clients.append(f'ip:{forwarded}')
+    return [PIN_CACHE_PREFIX + hashlib.sha256(client.encode()).hexdigest() for client in clients]
+
+
+def _stream_from(alias, chunks):
+    # Streamed bodies are generated after the middleware returns, so set the
+    # alias again around each chunk
+    chunks = iter(chunks)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+async def _astream_from(alias, chunks):
+    """Async version of _stream_from, for streaming responses with async content"""
+    chunks = aiter(chunks)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+class ReplicaMiddleware:
+    """
+    Routes the reads of safe (GET/HEAD/OPTIONS) requests to a healthy read
+    replica. After a client sends any other request it is pinned to the
+    primary for REPLICA_PIN_SECONDS, so it reads its own writes even while
+    the replicas catch up. Does nothing unless DATABASE_REPLICAS is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            cache.set_many(dict.fromkeys(_client_keys(request), True), timeout=settings.REPLICA_PIN_SECONDS)
+            return response
+
+        alias = None
+        if not cache.get_many(_client_keys(request)):
+            replicas = healthy_replicas()
+            if replicas:
+                alias = random.choice(replicas)
+        if alias is None:
+            return self.get_response(request)
+
+        token = _read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if response.streaming:
+            response.streaming_content = _stream_from(alias, response.streaming_content)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            await cache.aset_many(dict.fromkeys(_client_keys(request), True), timeout=settings.REPLICA_PIN_SECONDS)
+            return response
+
+        alias = None
+        if not await cache.aget_many(_client_keys(request)):
+            # Health checks query the replicas, which has to happen off the event loop
+            replicas = await sync_to_async(healthy_replicas)()
+            if replicas:
+                alias = random.choice(replicas)
+        if alias is None:
+            return await self.get_response(request)
+
+        # sync_to_async copies this context, so the view's ORM calls see the alias
+        token = _read_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if response.streaming:
+            stream = _astream_from if response.is_async else _stream_from
+            response.streaming_content = stream(alias, response.streaming_content)
+        return response
@@ -0,0 +1,76 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .academic import term_for_date
+from .models import AttendanceRollup
+
+
+# Attendance.status -> AttendanceRollup counter field
+STATUS_FIELDS = {
+    'Present': 'present',
+    'Absent': 'absent',
+    'Late': 'late',
+    'Excused': 'excused',
+}
+
+
+def rollup_deltas(changes):
+    """
+    Net counter changes for a set of Attendance row changes.
+
+    ``changes`` yields (old_state, new_state) pairs as returned by
+    Attendance.rollup_state(); None means the row did not exist before/after.
+    Returns {(student_id, class_id, term): Counter(status -> delta)}.
+    """
+    deltas = defaultdict(Counter)
+    for old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            student_id, class_id, date, status = old
+            deltas[(student_id, class_id, term_for_date(date))][status] -= 1
+        if new is not None:
+            student_id, class_id, date, status = new
+            deltas[(student_id, class_id, term_for_date(date))][status] += 1
+    return deltas
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add ``deltas`` to the rollup counters with F() expressions.
+
+    Rows for keys gaining a count are created first (ignoring ones that
+    already exist), then keys sharing a class, term and delta vector are
+    updated together, so a whole roll call costs a handful of statements,
+    not one per student. Pure decrements only touch existing rows: during
+    a cascade delete the rollup may already be gone along with its student.
+    """
+    deltas = {key: counter for key, counter in deltas.items() if any(counter.values())}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        AttendanceRollup.objects.bulk_create(
+            [
+                AttendanceRollup(student_id=s, class_attended_id=c, term=t)
+                for (s, c, t), counter in deltas.items() if any(n > 0 for n in counter.values())
+            ],
+            ignore_conflicts=True,
+        )
+        groups = defaultdict(list)
+        for (student_id, class_id, term), counter in deltas.items():
+            vector = tuple(counter.get(status, 0) for status in STATUS_FIELDS)
+            groups[(class_id, term, vector)].append(student_id)
+
+        now = timezone.now()
+        for (class_id, term, vector), student_ids in groups.items():
+            increments = {
+                field: F(field) + amount
+                for field, amount in zip(STATUS_FIELDS.values(), vector) if amount
+            }
+            AttendanceRollup.objects.filter(
+                class_attended_id=class_id, term=term, student_id__in=student_ids,
+            ).update(updated_at=now, **increments)
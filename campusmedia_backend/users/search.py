@@ -0,0 +1,146 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Announcement
+
+
+SQLITE_FTS_TABLE = 'announcements_fts'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """Split free text into words, dropping any search-engine operators"""
+    return _WORD_RE.findall(query or '')
+
+
+def _audience_sql(role, params):
+    # Same audience rule as the feed: global announcements plus the role's own
+    if role:
+        params.append(role)
+        return '(a.target_role IS NULL OR a.target_role = %s)'
+    return 'a.target_role IS NULL'
+
+
+def _mysql_ranked_ids(terms, role, limit, offset):
+    text = ' '.join(terms)
+    params = [text, text]
+    audience = _audience_sql(role, params)
+    sql = (
+        'SELECT a.id, MATCH(a.title, a.content) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score '
+        'FROM announcements a '
+        'WHERE MATCH(a.title, a.content) AGAINST (%s IN NATURAL LANGUAGE MODE) '
+        f'AND a.is_active = 1 AND {audience} '
+        'ORDER BY score DESC, a.id DESC LIMIT %s OFFSET %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit, offset])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _fts5_query(terms):
+    # Quote each word so user input can't form FTS5 syntax; trailing * makes
+    # the last word a prefix match for search-as-you-type.
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+
+def _sqlite_ranked_ids(terms, role, limit, offset):
+    params = [_fts5_query(terms)]
+    audience = _audience_sql(role, params)
+    sql = (
+        f'SELECT a.id, bm25({SQLITE_FTS_TABLE}) AS score '
+        f'FROM {SQLITE_FTS_TABLE} JOIN announcements a ON a.id = {SQLITE_FTS_TABLE}.rowid '
+        f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND a.is_active = 1 AND {audience} '
+        'ORDER BY score, a.id DESC LIMIT %s OFFSET %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit, offset])
+        # bm25() is lower-is-better; flip it so higher means more relevant
+        return [(row[0], -float(row[1])) for row in cursor.fetchall()]
+
+
+def _fallback_ranked_ids(terms, role, limit, offset):
+    queryset = Announcement.objects.filter(is_active=True)
+    audience = Q(target_role__isnull=True)
+    if role:
+        audience |= Q(target_role=role)
+    queryset = queryset.filter(audience)
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    ids = queryset.order_by('-created_at', '-id').values_list('id', flat=True)[offset:offset + limit]
+    return [(pk, 0.0) for pk in ids]
+
+
+def full_text_filter(queryset, query):
+    """
+    Restrict an Announcement queryset to rows whose title/content match
+    ``query``, via the full-text index. Unranked; used by the admin search.
+    """
+    terms = search_terms(query)
+    if connection.vendor == 'mysql':
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        return queryset.filter(id__in=RawSQL(
+            'SELECT id FROM announcements WHERE MATCH(title, content) AGAINST (%s IN BOOLEAN MODE)',
+            [boolean_query],
+        ))
+    if connection.vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s',
+            [_fts5_query(terms)],
+        ))
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    return queryset
+
+
+def search_announcements(query, role=None, page=1, page_size=20):
+    """
+    Relevance-ranked search over active announcement titles and content.
+
+    Uses the MySQL FULLTEXT index in production and an FTS5 table on SQLite;
+    other backends fall back to icontains. Returns (results, has_more), where
+    results is a list of (announcement, score) in rank order.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    offset = (page - 1) * page_size
+    if connection.vendor == 'mysql':
+        ranked = _mysql_ranked_ids(terms, role, page_size + 1, offset)
+    elif connection.vendor == 'sqlite':
+        ranked = _sqlite_ranked_ids(terms, role, page_size + 1, offset)
+    else:
+        ranked = _fallback_ranked_ids(terms, role, page_size + 1, offset)
+
+    has_more = len(ranked) > page_size
+    ranked = ranked[:page_size]
+    announcements = Announcement.objects.select_related('created_by').in_bulk([pk for pk, _ in ranked])
+    results = [(announcements[pk], score) for pk, score in ranked if pk in announcements]
+    return results, has_more
+
+
+def index_announcement(announcement):
+    """
+    Refresh one announcement in the search index.
+    Only SQLite needs this; InnoDB maintains FULLTEXT indexes itself.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s', [announcement.pk])
+        cursor.execute(
+            f'INSERT INTO {SQLITE_FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+            [announcement.pk, announcement.title, announcement.content],
+        )
+
+
+def unindex_announcement(announcement_id):
+    """Remove a deleted announcement from the search index (SQLite only)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s', [announcement_id])
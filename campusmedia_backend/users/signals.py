@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import User, ClassEnrollment, Attendance, Grade, Announcement
+from .feed import invalidate_announcement_feed
+from .search import index_announcement, unindex_announcement
+from .typeahead import INDEXED_FIELDS, index_user
+from .rollups import apply_rollup_deltas, rollup_deltas
+from .analytics import invalidate_class_grade_stats
+from .enrollment import adjust_student_count
+
+
+@receiver(post_save, sender=Announcement)
+def announcement_saved(sender, instance, raw=False, **kwargs):
+    # After commit, or a feed request could re-cache the old rows under the new version
+    transaction.on_commit(invalidate_announcement_feed)
+    if not raw:
+        index_announcement(instance)
+
+
+@receiver(post_delete, sender=Announcement)
+def announcement_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_announcement_feed)
+    unindex_announcement(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    index_user(instance)
+
+
+@receiver(post_save, sender=ClassEnrollment)
+def enrollment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_student_count(instance.class_enrolled_id, 1)
+
+
+@receiver(post_delete, sender=ClassEnrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    adjust_student_count(instance.class_enrolled_id, -1)
+
+
+@receiver(pre_save, sender=Attendance)
+@receiver(pre_delete, sender=Attendance)
+def attendance_snapshot(sender, instance, raw=False, **kwargs):
+    # Rows loaded with deferred fields have no snapshot from from_db; read
+    # what is stored before it changes
+    if raw or instance._state.adding or hasattr(instance, '_rollup_state'):
+        return
+    instance._rollup_state = (
+        sender._base_manager.using(instance._state.db)
+        .filter(pk=instance.pk).values_list(*sender.ROLLUP_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    new_state = instance.rollup_state()
+    apply_rollup_deltas(rollup_deltas([(getattr(instance, '_rollup_state', None), new_state)]))
+    instance._rollup_state = new_state
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    old_state = instance._rollup_state if hasattr(instance, '_rollup_state') else instance.rollup_state()
+    apply_rollup_deltas(rollup_deltas([(old_state, None)]))
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def grade_changed(sender, instance, **kwargs):
+    # After commit, or a concurrent read could re-cache the old stats for an hour
+    class_id = instance.class_graded_id
+    transaction.on_commit(lambda: invalidate_class_grade_stats(class_id))
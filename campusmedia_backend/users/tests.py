@@ -1,3 +1,884 @@
-from django.test import TestCase
+"""
+API regression tests: response shape and an exact SQL query budget for
+every endpoint, against a seeded campus. A view that starts issuing a query
+per row (N+1) fails here instead of in production.
 
-# Create your tests here.
+    python manage.py test --settings=campusmedia_backend.test_settings
+"""
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from campusmedia_backend.mysql_pool import pool as mysql_pool
+from campusmedia_backend.mysql_pool.pool import ConnectionPool, PoolTimeout
+
+from . import replicas
+from .academic import academic_year_bounds, academic_year_label, academic_year_start, term_for_date
+from .archival import move_rows
+from .attendance import mark_class_attendance
+from .authentication import issue_token
+from .enrollment import enroll_students
+from .grade_import import GradeImportError, import_grades, read_grade_rows
+from .management.commands.benchmark_endpoints import compare, summarize
+from .management.commands.index_advisor import explain, index_columns, suggest_index
+from .metrics import collect, registry, render
+from .models import (
+    Announcement, ArchivedAcademicYear, Attendance, AttendanceArchive, AttendanceRollup, Class, ClassEnrollment,
+    Grade, GradeArchive, User,
+)
+from .replicas import ReplicaMiddleware, ReplicaRouter, read_from_primary, reset_replica_health
+from .throttling import reset_login_throttle
+from .typeahead import index_users
+
+
+PASSWORD = 'Campus@123'
+STUDENTS = 30
+CLASSES = 3
+ENROLLED_PER_CLASS = 20
+
+
+def make_user(role, n, **fields):
+    return User.objects.create(
+        first_name=f'{role}{n}',
+        last_name='Test',
+        email=f'{role.lower()}{n}@campus.edu',
+        register_number=f'{role[:3].upper()}{n:04d}',
+        phone='9876543210',
+        role=role,
+        password=PASSWORD,
+        **fields,
+    )
+
+
+def seed_campus(cls):
+    """A small but complete campus: every table an endpoint reads has rows"""
+    cls.admin = make_user('Admin', 1)
+    cls.principal = make_user('Principal', 1)
+    cls.teacher = make_user('Staff', 1, qualification='M.Sc Mathematics')
+    cls.other_teacher = make_user('Staff', 2)
+
+    hashed = make_password(PASSWORD)
+    User.objects.bulk_create([
+        User(
+            first_name=f'Student{n}', last_name='Test', email=f'student{n}@campus.edu',
+            register_number=f'STU{n:04d}', phone='9876543210', role='Student', password=hashed,
+            student_class='BSc Year 1',
+        )
+        for n in range(STUDENTS)
+    ])
+    students = User.objects.filter(role='Student')
+    index_users(students.values_list('id', 'first_name', 'last_name', 'email', 'register_number'))
+    student_ids = list(students.order_by('id').values_list('id', flat=True))
+    cls.student = students.get(id=student_ids[0])
+
+    cls.classes = []
+    today = timezone.localdate()
+    for n in range(CLASSES):
+        class_obj = Class.objects.create(
+            class_name=f'Class {n}', subject='Mathematics', schedule='Mon, Wed • 9:00 AM', teacher=cls.teacher,
+        )
+        enrolled = student_ids[n * 5:n * 5 + ENROLLED_PER_CLASS]
+        enroll_students(class_obj, enrolled)
+        for assignment in ('Quiz 1', 'Midterm'):
+            scores = [(i * 7 + n * 3) % 101 for i in range(len(enrolled))]
+            Grade.objects.bulk_create([
+                Grade(student_id=student_id, class_graded=class_obj, assignment_name=assignment,
+                      score=score, grade_letter=letter, graded_by=cls.teacher)
+                for student_id, score, letter in zip(enrolled, scores, Grade.letters_for_scores(scores))
+            ])
+        for days_ago in (1, 2):
+            mark_class_attendance(
+                class_obj, today - datetime.timedelta(days=days_ago),
+                {enrolled[0]: 'A', enrolled[1]: 'L'}, cls.teacher.id, default_status='P',
+            )
+        cls.classes.append(class_obj)
+    cls.class_obj = cls.classes[0]
+
+    for n in range(5):
+        Announcement.objects.create(title=f'Campus notice {n}', content='Library hours change', created_by=cls.principal)
+    for n in range(3):
+        Announcement.objects.create(title=f'Exam schedule {n}', content='Exams start Monday',
+                                    created_by=cls.teacher, target_role='Student')
+    for n in range(2):
+        Announcement.objects.create(title=f'Staff meeting {n}', content='Meeting in hall',
+                                    created_by=cls.principal, target_role='Staff')
+
+
+class APITestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_campus(cls)
+
+    def setUp(self):
+        # Start every test cold, so query counts don't depend on test order
+        cache.clear()
+        reset_login_throttle()
+
+    def auth(self, user):
+        token, _ = issue_token(user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def get(self, url, user=None, queries=None, **extra):
+        headers = self.auth(user) if user else {}
+        if queries is None:
+            return self.client.get(url, **headers, **extra)
+        with self.assertNumQueries(queries):
+            return self.client.get(url, **headers, **extra)
+
+    def post(self, url, data, user=None, queries=None, **extra):
+        headers = self.auth(user) if user else {}
+        if 'content_type' not in extra and not any(isinstance(v, SimpleUploadedFile) for v in data.values()):
+            extra['content_type'] = 'application/json'
+        if queries is None:
+            return self.client.post(url, data, **headers, **extra)
+        with self.assertNumQueries(queries):
+            return self.client.post(url, data, **headers, **extra)
+
+    def assertKeys(self, data, keys):
+        self.assertTrue(set(keys) <= set(data), f'missing {set(keys) - set(data)} in {sorted(data)}')
+
+
+class AuthTests(APITestCase):
+    def test_register(self):
+        response = self.post('/api/users/register/', {
+            'first_name': 'New', 'last_name': 'Student', 'email': 'new@campus.edu',
+            'register_number': 'NEW0001', 'phone': '9876543210', 'role': 'Student', 'password': PASSWORD,
+        }, queries=5)
+        self.assertEqual(response.status_code, 201)
+        self.assertKeys(response.json()['user'], ['id', 'email', 'role', 'profile_completed'])
+        self.assertNotIn('password', response.json()['user'])
+
+    def test_register_duplicate_email(self):
+        response = self.post('/api/users/register/', {
+            'first_name': 'Dup', 'last_name': 'User', 'email': self.student.email,
+            'register_number': 'DUP0001', 'phone': '9876543210', 'role': 'Student', 'password': PASSWORD,
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_login(self):
+        response = self.post('/api/users/login/', {
+            'email': self.student.email, 'password': PASSWORD, 'role': 'Student',
+        }, queries=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertKeys(response.json(), ['success', 'token', 'expires_at', 'user'])
+
+    def test_login_throttled(self):
+        for _ in range(5):
+            self.post('/api/users/login/', {'email': self.student.email, 'password': 'wrong', 'role': 'Student'})
+        response = self.post('/api/users/login/', {
+            'email': self.student.email, 'password': PASSWORD, 'role': 'Student',
+        }, queries=0)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_throttle_stats_admin_only(self):
+        response = self.get('/api/users/login/throttle-stats/', self.admin, queries=0)
+        self.assertEqual(response.status_code, 200)
+        self.assertKeys(response.json()['stats'], ['rejected_account', 'rejected_ip', 'rejected_total'])
+        self.assertEqual(self.get('/api/users/login/throttle-stats/', self.teacher).status_code, 403)
+
+    def test_logout_revokes_token(self):
+        headers = self.auth(self.student)
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/users/logout/', **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/students/{self.student.id}/dashboard/', **headers).status_code, 401)
+
+    def test_token_survives_cache_loss(self):
+        headers = self.auth(self.student)
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/login/throttle-stats/', **headers)
+        self.assertEqual(response.status_code, 403)
+
+
+class UserTests(APITestCase):
+    def test_list_users(self):
+        response = self.get('/api/users/?page_size=10', queries=1)
+        data = response.json()
+        self.assertEqual(data['page_count'], 10)
+        self.assertTrue(data['has_more'])
+        self.assertKeys(data, ['success', 'page_count', 'next_cursor', 'has_more', 'users'])
+        self.assertNotIn('count', data)
+
+        ids = [user['id'] for user in data['users']]
+        while data['next_cursor']:
+            data = self.get(f'/api/users/?page_size=10&cursor={data["next_cursor"]}', queries=1).json()
+            ids.extend(user['id'] for user in data['users'])
+        self.assertEqual(len(ids), User.objects.count())
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_list_users_filtered_with_count(self):
+        data = self.get('/api/users/?role=Student&include_count=true', queries=2).json()
+        self.assertEqual(data['count'], STUDENTS)
+        self.assertEqual({user['role'] for user in data['users']}, {'Student'})
+        self.assertEqual(self.get('/api/users/?role=Wizard').status_code, 400)
+        self.assertEqual(self.get('/api/users/?cursor=garbage').status_code, 400)
+
+    def test_search_users(self):
+        data = self.get('/api/users/search/?q=stud stu0003', queries=1).json()
+        self.assertEqual([user['email'] for user in data['users']], ['student3@campus.edu'])
+
+    def test_get_user(self):
+        response = self.get(f'/api/users/{self.student.id}/', queries=1)
+        self.assertKeys(response.json()['user'], ['id', 'first_name', 'email', 'role'])
+        self.assertEqual(self.get('/api/users/999999/').status_code, 404)
+
+    def test_update_student_details(self):
+        response = self.post('/api/users/update-student-details/', {
+            'student_class': 'BSc Year 2', 'stream': 'Science', 'year': '2026', 'department': 'Physics',
+        }, self.student, queries=3)
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.department, 'Physics')
+        self.assertTrue(self.student.profile_completed)
+        self.assertTrue(self.student.check_password(PASSWORD))
+
+    def test_update_staff_details(self):
+        response = self.post('/api/users/update-staff-details/', {
+            'qualification': 'PhD', 'subject_expertise': 'Algebra', 'experience_years': 9,
+        }, self.teacher, queries=3)
+        self.assertEqual(response.status_code, 200)
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.experience_years, 9)
+        self.assertEqual(self.post('/api/users/update-staff-details/', {'qualification': 'x'}, self.student).status_code, 403)
+
+
+class AnnouncementTests(APITestCase):
+    def test_create_announcement(self):
+        response = self.post('/api/users/announcements/create/', {
+            'title': 'Sports day', 'content': 'Friday', 'target_role': 'Student',
+        }, self.teacher, queries=3)
+        self.assertEqual(response.status_code, 201)
+        self.assertKeys(response.json()['announcement'], ['id', 'title', 'created_by', 'created_at'])
+        self.assertEqual(self.post('/api/users/announcements/create/', {
+            'title': 'x', 'content': 'y'}, self.student).status_code, 403)
+
+    def test_feed_is_role_targeted(self):
+        data = self.get('/api/users/announcements/', self.student, queries=3).json()
+        self.assertKeys(data, ['success', 'count', 'next_cursor', 'has_more', 'announcements'])
+        self.assertEqual({item['target_role'] for item in data['announcements']}, {None, 'Student'})
+        self.assertEqual(data['count'], 8)
+
+    def test_feed_served_from_cache(self):
+        self.get('/api/users/announcements/?role=Staff')
+        response = self.get('/api/users/announcements/?role=Staff', queries=0)
+        self.assertEqual(response.json()['count'], 7)
+        self.assertEqual(self.get('/api/users/announcements/?role=Staff', queries=0,
+                                  HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_feed_invalidated_after_commit(self):
+        self.get('/api/users/announcements/?role=Staff')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Announcement.objects.create(title='Fire drill', content='Noon', created_by=self.principal)
+            # Still the cached feed: the new row isn't committed yet
+            self.assertEqual(self.get('/api/users/announcements/?role=Staff', queries=0).json()['count'], 7)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get('/api/users/announcements/?role=Staff').json()['count'], 8)
+
+    def test_feed_query_count_does_not_grow(self):
+        for n in range(30):
+            Announcement.objects.create(title=f'More {n}', content='...', created_by=self.principal)
+        cache.clear()
+        data = self.get('/api/users/announcements/?page_size=25', queries=2).json()
+        self.assertEqual(data['count'], 25)
+
+    def test_search_announcements(self):
+        data = self.get('/api/users/announcements/search/?q=exam', self.student, queries=2).json()
+        self.assertEqual(data['count'], 3)
+        self.assertKeys(data['announcements'][0], ['id', 'title', 'score', 'created_by'])
+        # Staff don't see student-targeted announcements
+        self.assertEqual(self.get('/api/users/announcements/search/?q=exam', self.teacher).json()['count'], 0)
+
+    def test_search_announcements_bad_params(self):
+        for query, message in [('role=Janitor', 'Invalid role'), ('role=Student&page=x', 'Invalid page')]:
+            response = self.get(f'/api/users/announcements/search/?q=exam&{query}')
+            self.assertEqual((response.status_code, response.json()['message']), (400, message))
+
+
+class ClassTests(APITestCase):
+    def test_list_classes(self):
+        data = self.get('/api/users/classes/', queries=1).json()
+        self.assertEqual(data['count'], CLASSES)
+        self.assertKeys(data['classes'][0], ['id', 'class_name', 'teacher_name', 'student_count'])
+        self.assertEqual({item['student_count'] for item in data['classes']}, {ENROLLED_PER_CLASS})
+
+    def test_enroll_and_unenroll(self):
+        outsiders = list(User.objects.filter(role='Student').exclude(
+            enrolled_classes__class_enrolled=self.class_obj).values_list('id', flat=True)[:5])
+        url = f'/api/users/classes/{self.class_obj.id}/'
+        response = self.post(url + 'enroll/', {'student_ids': outsiders}, self.teacher, queries=9)
+        self.assertEqual(response.json()['student_count'], ENROLLED_PER_CLASS + 5)
+
+        response = self.post(url + 'unenroll/', {'student_ids': outsiders[:2]}, self.teacher, queries=7)
+        self.assertEqual(response.json()['student_count'], ENROLLED_PER_CLASS + 3)
+        self.class_obj.refresh_from_db()
+        self.assertEqual(self.class_obj.student_count, ClassEnrollment.objects.filter(class_enrolled=self.class_obj).count())
+
+    def test_enroll_race_is_counted_once(self):
+        outsiders = list(User.objects.filter(role='Student').exclude(
+            enrolled_classes__class_enrolled=self.class_obj).values_list('id', flat=True)[:3])
+        bulk_create = ClassEnrollment.objects.bulk_create
+        raced = []
+
+        def racing_bulk_create(objs, **kwargs):
+            # A single enrollment lands between the "already enrolled" read and the INSERT
+            if not raced:
+                raced.append(ClassEnrollment.objects.create(class_enrolled=self.class_obj, student_id=outsiders[0]))
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(ClassEnrollment.objects, 'bulk_create', side_effect=racing_bulk_create):
+            enroll_students(self.class_obj, outsiders)
+        self.class_obj.refresh_from_db()
+        self.assertEqual(self.class_obj.student_count, ClassEnrollment.objects.filter(class_enrolled=self.class_obj).count())
+        self.assertEqual(self.class_obj.student_count, ENROLLED_PER_CLASS + 3)
+
+    def test_enroll_permissions(self):
+        url = f'/api/users/classes/{self.class_obj.id}/enroll/'
+        self.assertEqual(self.post(url, {'student_ids': [self.student.id]}, self.other_teacher).status_code, 403)
+        self.assertEqual(self.post(url, {'student_ids': [self.teacher.id]}, self.teacher).status_code, 400)
+
+
+class AttendanceTests(APITestCase):
+    def test_mark_attendance(self):
+        response = self.post('/api/users/attendance/mark/', {
+            'class_id': self.class_obj.id, 'date': str(timezone.localdate()),
+            'default_status': 'P', 'statuses': {str(self.student.id): 'A'},
+        }, self.teacher, queries=12)
+        data = response.json()
+        self.assertEqual(data['marked'], ENROLLED_PER_CLASS)
+        self.assertEqual(data['summary'], {'Present': ENROLLED_PER_CLASS - 1, 'Absent': 1})
+
+    def test_mark_attendance_rejects_malformed_input(self):
+        for class_id, date in (('abc', str(timezone.localdate())), (self.class_obj.id, '2026-02-30')):
+            response = self.post('/api/users/attendance/mark/', {
+                'class_id': class_id, 'date': date, 'default_status': 'P', 'statuses': {},
+            }, self.teacher)
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json()['success'])
+
+    def test_mark_attendance_rejects_other_teacher(self):
+        response = self.post('/api/users/attendance/mark/', {
+            'class_id': self.class_obj.id, 'date': str(timezone.localdate()), 'default_status': 'P', 'statuses': {},
+        }, self.other_teacher)
+        self.assertEqual(response.status_code, 403)
+
+    def test_summary_matches_rows(self):
+        data = self.get(f'/api/users/attendance/summary/{self.student.id}/', self.student, queries=1).json()
+        self.assertKeys(data, ['success', 'student_id', 'term', 'overall_percentage', 'classes'])
+        rows = Attendance.objects.filter(student=self.student, class_attended=self.class_obj)
+        summary = next(item for item in data['classes'] if item['class_id'] == self.class_obj.id)
+        self.assertEqual(summary['absent'], rows.filter(status='Absent').count())
+        self.assertEqual(summary['total'], rows.count())
+        other = User.objects.filter(role='Student').exclude(id=self.student.id).first()
+        self.assertEqual(self.get(f'/api/users/attendance/summary/{other.id}/', self.student).status_code, 403)
+
+    def test_rollups_follow_edits(self):
+        record = Attendance.objects.filter(student=self.student, status='Absent').first()
+        record.status = 'Present'
+        record.save()
+        rollup = AttendanceRollup.objects.get(student=self.student, class_attended=record.class_attended)
+        self.assertEqual((rollup.present, rollup.absent), (1, 1))
+
+    def test_rollups_follow_deferred_loads(self):
+        self.assertIsNotNone(Attendance.objects.only('id').first())
+        record = Attendance.objects.only('id', 'remarks').filter(student=self.student, status='Absent').first()
+        record.status = 'Excused'
+        record.save()
+        rollup = AttendanceRollup.objects.get(student=self.student, class_attended=self.class_obj)
+        self.assertEqual((rollup.absent, rollup.excused), (1, 1))
+        Attendance.objects.defer('status').get(pk=record.pk).delete()
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.absent, rollup.excused, rollup.total), (1, 0, 1))
+
+
+class GradeTests(APITestCase):
+    def test_grade_stats(self):
+        url = f'/api/users/classes/{self.class_obj.id}/grade-stats/'
+        data = self.get(url, self.teacher, queries=2).json()
+        self.assertEqual(data['overall']['count'], ENROLLED_PER_CLASS * 2)
+        self.assertKeys(data['overall'], ['mean', 'median', 'std_dev', 'percentiles', 'letter_histogram'])
+        self.assertEqual(sum(data['overall']['letter_histogram'].values()), ENROLLED_PER_CLASS * 2)
+        self.assertEqual([item['assignment_name'] for item in data['assignments']], ['Midterm', 'Quiz 1'])
+        # Cached: only the class lookup runs now
+        self.get(url + '?assignment=Midterm', self.teacher, queries=1)
+        self.assertEqual(self.get(url, self.student).status_code, 403)
+
+    def test_grade_stats_invalidated_on_save(self):
+        url = f'/api/users/classes/{self.class_obj.id}/grade-stats/'
+        self.get(url, self.teacher)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Grade.objects.create(student=self.student, class_graded=self.class_obj,
+                                 assignment_name='Final', score=100, graded_by=self.teacher)
+            # Still cached until the grade commits
+            self.assertEqual(self.get(url, self.teacher).json()['overall']['count'], ENROLLED_PER_CLASS * 2)
+        for callback in callbacks:
+            callback()
+        data = self.get(url, self.teacher).json()
+        self.assertEqual(data['overall']['count'], ENROLLED_PER_CLASS * 2 + 1)
+
+    def test_letter_thresholds(self):
+        scores = [0, 59, 60, 69, 70, 79, 80, 89, 90, 100]
+        self.assertEqual(Grade.letters_for_scores(scores), list('FFDDCCBBAA'))
+
+    def test_import_grades(self):
+        enrolled = list(ClassEnrollment.objects.filter(class_enrolled=self.class_obj)
+                        .values_list('student_id', flat=True))
+        rows = ['student_id,class_id,assignment_name,score']
+        rows += [f'{student_id},{self.class_obj.id},Final,{50 + i}' for i, student_id in enumerate(enrolled)]
+        rows += [f'{enrolled[0]},{self.class_obj.id},Midterm,95', 'x,1,Final,10']
+        upload = SimpleUploadedFile('grades.csv', '\n'.join(rows).encode())
+        response = self.post('/api/users/grades/import/', {'file': upload}, self.teacher, queries=7)
+        data = response.json()
+        self.assertEqual((data['created'], data['updated'], data['skipped']), (ENROLLED_PER_CLASS, 1, 1))
+        grade = Grade.objects.get(student_id=enrolled[0], class_graded=self.class_obj, assignment_name='Midterm')
+        self.assertEqual((grade.score, grade.grade_letter), (95, 'A'))
+
+    def test_import_grades_partial_file(self):
+        csv_file = io.BytesIO(
+            f'student_id,class_id,assignment_name,score\n\n'
+            f'{self.student.id},{self.class_obj.id},Final,200\n'
+            f'{self.student.id},{self.class_obj.id},Final,80\n'.encode() + b'\xff\n'
+        )
+        with self.assertRaises(GradeImportError) as raised:
+            import_grades(read_grade_rows(csv_file, 'grades.csv'), chunk_size=1)
+        # Row numbers are file lines, counting the blank one
+        self.assertEqual((raised.exception.created, raised.exception.updated), (1, 0))
+        rows = [(line, row['score']) for line, row in read_grade_rows(io.BytesIO(csv_file.getvalue()[:-2]), 'g.csv')]
+        self.assertEqual(rows, [(3, '200'), (4, '80')])
+        self.assertTrue(Grade.objects.filter(student=self.student, assignment_name='Final', score=80).exists())
+
+    def test_import_grades_other_teachers_class(self):
+        upload = SimpleUploadedFile('grades.csv', f'student_id,class_id,assignment_name,score\n'
+                                                  f'{self.student.id},{self.class_obj.id},Final,80\n'.encode())
+        data = self.post('/api/users/grades/import/', {'file': upload}, self.other_teacher).json()
+        self.assertEqual((data['created'], data['skipped']), (0, 1))
+
+
+class ExportTests(APITestCase):
+    def test_export_ndjson(self):
+        headers = self.auth(self.principal)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/export/users/?role=Student', **headers)
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), STUDENTS)
+        self.assertIn('email', json.loads(lines[0]))
+
+    def test_export_csv(self):
+        headers = self.auth(self.admin)
+        response = self.client.get(f'/api/users/export/grades/?format=csv&class_id={self.class_obj.id}', **headers)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), ENROLLED_PER_CLASS * 2 + 1)
+
+    def test_export_requires_principal(self):
+        self.assertEqual(self.client.get('/api/users/export/users/', **self.auth(self.teacher)).status_code, 403)
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # One roll call and one assignment in an academic year that has ended
+        self.old_year = academic_year_start(timezone.localdate()) - 2
+        self.old_date = academic_year_bounds(self.old_year)[0] + datetime.timedelta(days=10)
+        mark_class_attendance(self.class_obj, self.old_date, {self.student.id: 'A'}, self.teacher.id,
+                              default_status='P')
+        Grade.objects.create(student=self.student, class_graded=self.class_obj, assignment_name='Old final',
+                             score=75, graded_by=self.teacher)
+        Grade.objects.filter(assignment_name='Old final').update(created_at=timezone.make_aware(
+            datetime.datetime.combine(self.old_date, datetime.time(10))))
+
+    def archive(self, year=None, **options):
+        call_command('archive_academic_year', str(year or self.old_year), batch_size=7,
+                     stdout=io.StringIO(), **options)
+
+    def test_archive_moves_closed_year(self):
+        term = term_for_date(self.old_date)
+        rollup = AttendanceRollup.objects.get(student=self.student, class_attended=self.class_obj, term=term)
+        self.archive()
+        self.assertFalse(Attendance.objects.filter(date=self.old_date).exists())
+        self.assertFalse(Grade.objects.filter(assignment_name='Old final').exists())
+        self.assertEqual(AttendanceArchive.objects.filter(date=self.old_date).count(), ENROLLED_PER_CLASS)
+        self.assertEqual(GradeArchive.objects.get().academic_year, academic_year_label(self.old_year))
+        record = ArchivedAcademicYear.objects.get(start_year=self.old_year)
+        self.assertEqual((record.status, record.attendance_rows, record.grade_rows),
+                         ('archived', ENROLLED_PER_CLASS, 1))
+        # Past terms keep their counts, and are rebuilt from the archive
+        self.assertEqual(AttendanceRollup.objects.get(pk=rollup.pk).absent, 1)
+        call_command('rebuild_attendance_rollups', stdout=io.StringIO())
+        self.assertEqual(AttendanceRollup.objects.get(
+            student=self.student, class_attended=self.class_obj, term=term).absent, 1)
+
+    def test_archive_resumes(self):
+        ArchivedAcademicYear.objects.create(start_year=self.old_year, label=academic_year_label(self.old_year))
+        self.archive()
+        self.archive()
+        record = ArchivedAcademicYear.objects.get(start_year=self.old_year)
+        self.assertEqual(record.attendance_rows, ENROLLED_PER_CLASS)
+        self.assertEqual(AttendanceArchive.objects.count(), ENROLLED_PER_CLASS)
+
+    def test_archive_refuses_open_year(self):
+        with self.assertRaises(CommandError):
+            self.archive(academic_year_start(timezone.localdate()))
+        with self.assertRaises(CommandError):
+            self.archive(f'{self.old_year}-99')
+
+    def test_export_reads_archive_for_date_range(self):
+        self.archive()
+        headers = self.auth(self.principal)
+        url = f'/api/users/export/attendance/?student_id={self.student.id}'
+        with self.assertNumQueries(1):
+            lines = b''.join(self.client.get(url, **headers).streaming_content).splitlines()
+        self.assertEqual(len(lines), 2)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'{url}&date_from={self.old_date}', **headers)
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['date'], str(self.old_date))
+        response = self.client.get(f'/api/users/export/grades/?date_to={self.old_date}', **headers)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)['assignment_name'] for line in lines], ['Old final'])
+
+    def test_export_refuses_interrupted_archive(self):
+        # The first batch moves, then the run dies
+        calls = []
+
+        def move_once(*args):
+            calls.append(args)
+            if len(calls) > 1:
+                raise OSError('killed')
+            return move_rows(*args)
+
+        with mock.patch('users.management.commands.archive_academic_year.move_rows', side_effect=move_once):
+            with self.assertRaises(OSError):
+                self.archive()
+        self.assertTrue(AttendanceArchive.objects.exists())
+        headers = self.auth(self.principal)
+        url = f'/api/users/export/attendance/?date_from={self.old_date}'
+        self.assertEqual(self.client.get(url, **headers).status_code, 409)
+        self.archive()
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(sum(json.loads(line)['date'] == str(self.old_date) for line in lines), ENROLLED_PER_CLASS)
+
+
+class ProvisioningTests(APITestCase):
+    def test_provision_users(self):
+        users = [{
+            'first_name': f'Intake{n}', 'last_name': 'Test', 'email': f'intake{n}@campus.edu',
+            'register_number': f'INT{n:04d}', 'phone': '9876543210', 'role': 'Student', 'password': PASSWORD,
+        } for n in range(10)]
+        users.append({**users[0], 'register_number': 'INT9999'})
+        # Requests hash on the shared thread pool; only the command starts processes
+        with mock.patch('users.provisioning.ProcessPoolExecutor') as process_pool:
+            response = self.post('/api/users/provision/', {'users': users}, self.admin, queries=7)
+        process_pool.assert_not_called()
+        data = response.json()
+        self.assertEqual((data['created'], data['skipped']), (10, 1))
+        self.assertEqual(data['errors'][0]['row'], 11)
+        self.assertTrue(User.objects.get(email='intake3@campus.edu').check_password(PASSWORD))
+        self.assertEqual(self.post('/api/users/provision/', {'users': users}, self.principal).status_code, 403)
+
+
+class DashboardTests(APITestCase):
+    def test_student_dashboard(self):
+        url = f'/api/students/{self.student.id}/dashboard/'
+        data = self.get(url, self.student, queries=8).json()
+        self.assertKeys(data, ['profile', 'term', 'stats', 'classes', 'recent_grades', 'announcements'])
+        self.assertKeys(data['classes'][0], ['class_name', 'teacher_name', 'average_score', 'attendance'])
+        self.assertEqual(data['stats']['enrolled_classes'], 1)
+
+    def test_student_dashboard_query_count_does_not_grow(self):
+        for class_obj in self.classes[1:]:
+            enroll_students(class_obj, [self.student.id])
+        url = f'/api/students/{self.student.id}/dashboard/'
+        data = self.get(url, self.student, queries=8).json()
+        self.assertEqual(data['stats']['enrolled_classes'], CLASSES)
+        # The announcement feed is cached after the first request
+        self.get(url, self.student, queries=5)
+
+    def test_staff_dashboard(self):
+        url = f'/api/staff/{self.teacher.id}/dashboard/'
+        data = self.get(url, self.teacher, queries=5).json()
+        self.assertEqual(data['stats']['classes_taught'], CLASSES)
+        self.assertEqual(data['stats']['total_students'], CLASSES * ENROLLED_PER_CLASS)
+        self.assertKeys(data['classes'][0], ['student_count', 'attendance_taken_today', 'average_score'])
+        self.get(url, self.teacher, queries=0)
+        self.assertEqual(self.get(url, self.other_teacher).status_code, 403)
+
+
+class MetricsTests(APITestCase):
+    def test_metrics_endpoint(self):
+        self.get(f'/api/users/{self.student.id}/')
+        response = self.client.get('/metrics')
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('route="api/users/<int:user_id>/"', body)
+
+    async def test_async_requests_count_queries(self):
+        # Both views run their queries on sync_to_async's worker thread
+        for url, route in [(f'/api/async/users/{self.student.id}/', 'api/async/users/<int:user_id>/'),
+                           (f'/api/users/{self.student.id}/', 'api/users/<int:user_id>/')]:
+            key = ('db_queries_per_request', (('method', 'GET'), ('route', route)))
+            before = registry.histograms.get(key, [None, 0, 0])[1]
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(registry.histograms[key][1], before)
+
+
+class LoadToolTests(TestCase):
+    def test_generate_campus(self):
+        call_command('generate_campus', students=40, staff=3, classes=6, classes_per_student=2, sessions=3,
+                     grades_per_enrollment=2, announcements=2, domain='bench.test', stdout=io.StringIO())
+        students = User.objects.filter(email__endswith='@bench.test', role='Student')
+        self.assertEqual(students.count(), 40)
+        self.assertEqual(ClassEnrollment.objects.count(), 80)
+        self.assertEqual(Attendance.objects.count(), 80 * 3)
+        self.assertEqual(Grade.objects.count(), 80 * 2)
+        # Counters written directly must match what the signals would have kept
+        for class_obj in Class.objects.all():
+            self.assertEqual(class_obj.student_count, class_obj.students.count())
+        rollup = AttendanceRollup.objects.first()
+        self.assertEqual(rollup.total, Attendance.objects.filter(
+            student=rollup.student, class_attended=rollup.class_attended).count())
+        self.assertTrue(students.first().check_password('Campus@123'))
+        with self.assertRaises(CommandError):
+            call_command('generate_campus', students=1, staff=1, classes=1, classes_per_student=1,
+                         domain='bench.test', stdout=io.StringIO())
+
+    def test_benchmark_baseline_comparison(self):
+        stats = summarize([0.010, 0.020, 0.030, 0.040], errors=0, elapsed=0.5)
+        self.assertEqual((stats['requests'], stats['throughput'], stats['p50_ms']), (4, 8.0, 25.0))
+        baseline = {'fast': {'p95_ms': 10.0, 'errors': 0}, 'slow': {'p95_ms': 10.0, 'errors': 0}}
+        results = {'fast': {'p95_ms': 11.0, 'errors': 0}, 'slow': {'p95_ms': 13.0, 'errors': 0},
+                   'new': {'p95_ms': 99.0, 'errors': 0}}
+        self.assertEqual([name for name, _ in compare(results, baseline, tolerance=0.2)], ['slow'])
+
+
+class IndexAdvisorTests(APITestCase):
+    def test_workload_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'queries.jsonl')
+            out = io.StringIO()
+            call_command('index_advisor', requests=2, endpoints=['users-list', 'staff-dashboard'],
+                         save_log=path, stdout=out)
+            self.assertIn('[users-list]', out.getvalue())
+            self.assertIn('No missing indexes found', out.getvalue())
+            replay = io.StringIO()
+            call_command('index_advisor', log=path, stdout=replay)
+            self.assertEqual(replay.getvalue().splitlines()[0], out.getvalue().splitlines()[1])
+
+    def test_suggests_missing_index(self):
+        sql = 'SELECT "users"."id" FROM "users" WHERE ("users"."phone" = %s AND "users"."is_active") ORDER BY "users"."id"'
+        self.assertIn(('users', 'full scan'), explain(connection, sql, ['9876543210']))
+        self.assertEqual(index_columns(sql, 'users'), ['phone', 'is_active', 'id'])
+        self.assertEqual(suggest_index(connection, 'users', ['phone', 'is_active', 'id']),
+                         ('users', ('phone', 'is_active', 'id')))
+        # Covered by user_role_active_idx, so nothing to add
+        self.assertIsNone(suggest_index(connection, 'users', ['role', 'is_active']))
+        self.assertIsNone(suggest_index(connection, 'U0', ['role']))
+
+    def test_hot_relations_use_indexes(self):
+        for queryset in (
+            Attendance.objects.filter(class_attended=self.class_obj, date=timezone.localdate()),
+            Grade.objects.filter(student=self.student, class_graded=self.class_obj),
+            User.objects.filter(role='Student', is_active=True).order_by('-created_at', '-id'),
+        ):
+            sql, params = queryset.query.sql_with_params()
+            self.assertNotIn('full scan', [problem for _, problem in explain(connection, sql, params)], sql)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(APITestCase):
+    # The seeded campus only exists on the primary; the replica is empty, so
+    # a 404 means the read went to the replica
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        super().setUp()
+        reset_replica_health()
+
+    def test_get_reads_from_replica(self):
+        self.assertEqual(self.get(f'/api/users/{self.student.id}/').status_code, 404)
+
+    async def test_async_get_reads_from_replica(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        self.assertTrue(iscoroutinefunction(ReplicaMiddleware(view)))
+        response = await self.async_client.get(f'/api/async/users/{self.student.id}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_streamed_export_reads_from_replica(self):
+        response = self.client.get('/api/users/export/users/', **self.auth(self.principal))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_tokens_resolve_on_primary(self):
+        headers = self.auth(self.admin)
+        cache.clear()
+        self.assertEqual(self.client.get('/api/users/login/throttle-stats/', **headers).status_code, 200)
+
+    def test_writer_is_pinned_to_primary(self):
+        headers = self.auth(self.student)
+        self.client.post('/api/users/update-student-details/', {'department': 'Physics'},
+                         content_type='application/json', **headers)
+        self.assertEqual(self.client.get(f'/api/users/{self.student.id}/', **headers).status_code, 200)
+        # Another client isn't pinned, even from the same address (a proxy or NAT)
+        self.assertEqual(self.client.get(f'/api/users/{self.student.id}/').status_code, 404)
+
+    def test_forwarded_address_pins_anonymous_writer(self):
+        with override_settings(LOGIN_THROTTLE={**settings.LOGIN_THROTTLE, 'TRUST_X_FORWARDED_FOR': True}):
+            self.client.post('/api/users/login/', {'email': 'nobody@campus.edu', 'password': 'x'},
+                             content_type='application/json', HTTP_X_FORWARDED_FOR='203.0.113.7')
+            url = f'/api/users/{self.student.id}/'
+            self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.7').status_code, 200)
+            self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.8').status_code, 404)
+
+    def test_cached_pages_are_built_on_primary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(title='Fire drill', content='Noon', created_by=self.principal)
+        # Not pinned, so the reads go to the replica, which is empty; the
+        # cached pages must still come from the primary
+        for _ in range(2):
+            data = self.get('/api/users/announcements/?role=Staff', REMOTE_ADDR='10.0.0.2').json()
+            self.assertEqual(data['announcements'][0]['title'], 'Fire drill')
+        data = self.get(f'/api/staff/{self.teacher.id}/dashboard/', self.teacher).json()
+        self.assertEqual(data['stats']['classes_taught'], CLASSES)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with mock.patch('users.replicas.replica_lag', return_value=60):
+            self.assertEqual(self.get(f'/api/users/{self.student.id}/').status_code, 200)
+        reset_replica_health()
+        with mock.patch('users.replicas.replica_lag', side_effect=OperationalError('gone')):
+            self.assertEqual(self.get(f'/api/users/{self.student.id}/').status_code, 200)
+
+    def test_read_from_primary(self):
+        router = ReplicaRouter()
+        token = replicas._read_alias.set('replica')
+        try:
+            self.assertEqual(router.db_for_read(User), 'replica')
+            with read_from_primary():
+                self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_write(User), 'default')
+        finally:
+            replicas._read_alias.reset(token)
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.broken = False
+
+    def ping(self):
+        if self.broken:
+            raise OSError('server has gone away')
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **options):
+        opened = []
+
+        def connect():
+            opened.append(FakeConnection(len(opened) + 1))
+            return opened[-1]
+
+        return ConnectionPool(connect, check=FakeConnection.ping, **options), opened
+
+    def test_reuses_released_connections(self):
+        pool, opened = self.make_pool(max_size=2)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(opened), 2)
+        pool.release(second)
+        self.assertEqual(pool.stats()['idle'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_waits_for_a_free_connection(self):
+        pool, _ = self.make_pool(max_size=1, timeout=5)
+        held = pool.acquire()
+        threading.Timer(0.05, pool.release, args=[held]).start()
+        self.assertIs(pool.acquire(), held)
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_seconds'], 0)
+
+    def test_times_out_when_saturated(self):
+        pool, _ = self.make_pool(max_size=1, timeout=0.01)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_broken_connection_is_replaced(self):
+        pool, opened = self.make_pool(max_size=1)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.broken = True
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+
+    def test_idle_and_old_connections_are_closed(self):
+        pool, _ = self.make_pool(max_idle=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+
+        pool, _ = self.make_pool(max_lifetime=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_failed_connect_frees_its_slot(self):
+        def connect():
+            raise OSError('refused')
+
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                pool.acquire()
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_pool_rebuilt_when_parameters_change(self):
+        self.addCleanup(mysql_pool._pools.pop, 'test-pool', None)
+        old = mysql_pool.pool_for('test-pool', 'db=a', lambda: self.make_pool()[0])
+        connection = old.acquire()
+        old.release(connection)
+        self.assertIs(mysql_pool.pool_for('test-pool', 'db=a', lambda: None), old)
+        new = mysql_pool.pool_for('test-pool', 'db=b', lambda: self.make_pool()[0])
+        self.assertIsNot(new, old)
+        self.assertTrue(connection.closed)
+
+    def test_pool_metrics(self):
+        self.addCleanup(mysql_pool._pools.pop, 'test-pool', None)
+        pool = mysql_pool.pool_for('test-pool', 'db=a', lambda: self.make_pool(max_size=3)[0])
+        pool.acquire()
+        body = render(collect())
+        self.assertIn('db_pool_connections{alias="test-pool",state="in_use"} 1', body)
+        self.assertIn('db_pool_max_size{alias="test-pool"} 3', body)
+        self.assertIn('# TYPE db_pool_waiting gauge', body)
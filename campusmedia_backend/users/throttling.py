@@ -0,0 +1,201 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOGIN_THROTTLE = {
+    'STORE': 'users.throttling.InMemoryThrottleStore',
+    'ACCOUNT_LIMIT': 5,
+    'ACCOUNT_WINDOW': 300,
+    'IP_LIMIT': 50,
+    'IP_WINDOW': 300,
+    'TRUST_X_FORWARDED_FOR': False,
+}
+
+
+class InMemoryThrottleStore:
+    """
+    Exact sliding-window log held in this process.
+    Cheap and lock-protected, but each worker process counts on its own.
+    """
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self._hits = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def _trim(self, hits, window, now):
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+
+    def count(self, key, window, now):
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._trim(hits, window, now)
+            return len(hits)
+
+    def add(self, key, window, now):
+        with self._lock:
+            self._hits.setdefault(key, deque()).append(now)
+            self._ops += 1
+            if self._ops % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+
+    def reset(self, key, window, now):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def _sweep(self, now):
+        # Drop keys whose newest hit is older than any window we use, so a
+        # flood of distinct emails cannot grow the dict without bound.
+        horizon = now - max(_config()['ACCOUNT_WINDOW'], _config()['IP_WINDOW'])
+        for key in [k for k, hits in self._hits.items() if not hits or hits[-1] <= horizon]:
+            del self._hits[key]
+
+
+class CacheThrottleStore:
+    """
+    Sliding-window counter kept in the Django cache, for sharing limits
+    across worker processes (use with a shared cache such as Redis).
+
+    Approximates the window from the current and previous fixed buckets,
+    weighting the previous one by how much of it still overlaps the window.
+    """
+    PREFIX = 'login-throttle:'
+
+    def _bucket_key(self, key, bucket):
+        return f'{self.PREFIX}{key}:{bucket}'
+
+    def count(self, key, window, now):
+        bucket = int(now // window)
+        current, previous = self._bucket_key(key, bucket), self._bucket_key(key, bucket - 1)
+        values = cache.get_many([current, previous])
+        overlap = 1 - (now % window) / window
+        return values.get(current, 0) + values.get(previous, 0) * overlap
+
+    def add(self, key, window, now):
+        bucket_key = self._bucket_key(key, int(now // window))
+        cache.add(bucket_key, 0, timeout=2 * window)
+        try:
+            cache.incr(bucket_key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(bucket_key, 1, timeout=2 * window)
+
+    def reset(self, key, window, now):
+        bucket = int(now // window)
+        cache.delete_many([self._bucket_key(key, bucket), self._bucket_key(key, bucket - 1)])
+
+
+class LoginThrottle:
+    """
+    Per-account and per-IP limits on failed logins.
+
+    Only failures are counted, and a successful login clears the account's
+    window, so legitimate users sharing a campus NAT are not locked out while
+    password guessing against one account (or from one address) is cut off
+    before any password hashing happens.
+    """
+
+    def __init__(self, store, account_limit, account_window, ip_limit, ip_window):
+        self.store = store
+        self.account_limit = account_limit
+        self.account_window = account_window
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self._lock = threading.Lock()
+        self._rejections = {'account': 0, 'ip': 0}
+
+    def check(self, account, ip):
+        """
+        Return None if the attempt may proceed, otherwise the number of
+        seconds the client should wait before retrying.
+        """
+        now = time.time()
+        if ip and self.store.count(f'ip:{ip}', self.ip_window, now) >= self.ip_limit:
+            return self._reject('ip', ip, self.ip_window)
+        if account and self.store.count(f'account:{account}', self.account_window, now) >= self.account_limit:
+            return self._reject('account', account, self.account_window)
+        return None
+
+    def record(self, account, ip, success):
+        """Record the outcome of an attempt that was allowed through"""
+        now = time.time()
+        if success:
+            if account:
+                self.store.reset(f'account:{account}', self.account_window, now)
+            return
+        if account:
+            self.store.add(f'account:{account}', self.account_window, now)
+        if ip:
+            self.store.add(f'ip:{ip}', self.ip_window, now)
+
+    def _reject(self, scope, key, window):
+        with self._lock:
+            self._rejections[scope] += 1
+        logger.warning('Login throttled (%s limit) for %s', scope, key)
+        return math.ceil(window)
+
+    def stats(self):
+        """Rejection counts since this process started"""
+        with self._lock:
+            rejections = dict(self._rejections)
+        return {
+            'rejected_account': rejections['account'],
+            'rejected_ip': rejections['ip'],
+            'rejected_total': rejections['account'] + rejections['ip'],
+        }
+
+
+def _config():
+    return {**DEFAULT_LOGIN_THROTTLE, **getattr(settings, 'LOGIN_THROTTLE', {})}
+
+
+_login_throttle = None
+_login_throttle_lock = threading.Lock()
+
+
+def get_login_throttle():
+    """The process-wide LoginThrottle built from settings.LOGIN_THROTTLE"""
+    global _login_throttle
+    if _login_throttle is None:
+        with _login_throttle_lock:
+            if _login_throttle is None:
+                conf = _config()
+                _login_throttle = LoginThrottle(
+                    import_string(conf['STORE'])(),
+                    conf['ACCOUNT_LIMIT'], conf['ACCOUNT_WINDOW'],
+                    conf['IP_LIMIT'], conf['IP_WINDOW'],
+                )
+    return _login_throttle
+
+
+def reset_login_throttle():
+    """Forget all counts and statistics (used when settings change, e.g. in tests)"""
+    global _login_throttle
+    with _login_throttle_lock:
+        _login_throttle = None
+
+
+def get_forwarded_ip(request):
+    """The client address from X-Forwarded-For, or None unless TRUST_X_FORWARDED_FOR is on"""
+    if _config()['TRUST_X_FORWARDED_FOR']:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return None
+
+
+def get_client_ip(request):
+    return get_forwarded_ip(request) or request.META.get('REMOTE_ADDR')
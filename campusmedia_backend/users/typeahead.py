@@ -0,0 +1,124 @@
+import re
+import unicodedata
+
+from .models import User, UserSearchPrefix
+
+
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 20  # UserSearchPrefix.prefix max_length
+INDEXED_FIELDS = ('first_name', 'last_name', 'email', 'register_number')
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def normalize(text):
+    """Lowercase and strip accents, so 'José' and 'jose' index the same"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokens_for(first_name, last_name, email, register_number):
+    """
+    Searchable tokens for one user: each word of the names, the email's
+    local part (whole and split on punctuation) and the register number
+    (whole, ignoring punctuation, and split). The email domain is skipped,
+    it is the same for almost everyone on campus.
+    """
+    tokens = set()
+    for value in (first_name, last_name):
+        tokens.update(_TOKEN_RE.findall(normalize(value)))
+
+    local_part = normalize(email).split('@', 1)[0]
+    local_tokens = _TOKEN_RE.findall(local_part)
+    tokens.update(local_tokens)
+    tokens.add(''.join(local_tokens))
+
+    register_tokens = _TOKEN_RE.findall(normalize(register_number))
+    tokens.update(register_tokens)
+    tokens.add(''.join(register_tokens))
+
+    tokens.discard('')
+    return tokens
+
+
+def prefixes_for(first_name, last_name, email, register_number):
+    prefixes = set()
+    for token in tokens_for(first_name, last_name, email, register_number):
+        for length in range(MIN_PREFIX_LENGTH, min(len(token), MAX_PREFIX_LENGTH) + 1):
+            prefixes.add(token[:length])
+    return prefixes
+
+
+def query_terms(query):
+    """Normalize a search box query the same way indexed values are"""
+    query = normalize(query)
+    if '@' in query:
+        query = query.split('@', 1)[0]
+    return [term for term in _TOKEN_RE.findall(query) if len(term) >= MIN_PREFIX_LENGTH]
+
+
+def index_user(user):
+    """
+    Bring one user's prefix rows in line with their current fields,
+    touching only the rows that changed.
+    """
+    wanted = prefixes_for(user.first_name, user.last_name, user.email, user.register_number)
+    existing = set(UserSearchPrefix.objects.filter(user=user).values_list('prefix', flat=True))
+    stale = existing - wanted
+    if stale:
+        UserSearchPrefix.objects.filter(user=user, prefix__in=stale).delete()
+    missing = wanted - existing
+    if missing:
+        UserSearchPrefix.objects.bulk_create(
+            [UserSearchPrefix(user=user, prefix=prefix) for prefix in missing],
+            ignore_conflicts=True,
+        )
+
+
+def index_users(rows, batch_size=5000):
+    """
+    Insert prefix rows for users that have none yet, e.g. after bulk_create.
+    ``rows`` yields (id, first_name, last_name, email, register_number).
+    """
+    batch = []
+    for user_id, *fields in rows:
+        batch.extend(UserSearchPrefix(user_id=user_id, prefix=prefix) for prefix in prefixes_for(*fields))
+        if len(batch) >= batch_size:
+            UserSearchPrefix.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        UserSearchPrefix.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def search_users(query, limit=10, role=None):
+    """
+    Users whose indexed tokens start with every term of ``query``, newest first.
+
+    Each term is an equality match on the (prefix, user) unique index, one
+    join per term, so the cost depends on the number of matches returned
+    rather than the size of the users table.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    users = User.objects.filter(is_active=True)
+    if role:
+        users = users.filter(role=role)
+    for term in terms:
+        users = users.filter(search_prefixes__prefix=term[:MAX_PREFIX_LENGTH])
+
+    # Terms longer than the stored prefixes only matched on their first
+    # MAX_PREFIX_LENGTH characters; over-fetch and finish those comparisons here.
+    long_terms = [term for term in terms if len(term) > MAX_PREFIX_LENGTH]
+    users = list(users.order_by('-id')[:limit * 5 if long_terms else limit])
+    if long_terms:
+        users = [
+            user for user in users
+            if all(
+                any(token.startswith(term) for token in tokens_for(
+                    user.first_name, user.last_name, user.email, user.register_number))
+                for term in long_terms
+            )
+        ][:limit]
+    return users
@@ -4,10 +4,23 @@ from . import views
 urlpatterns = [
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
+    path('login/throttle-stats/', views.login_throttle_stats, name='login-throttle-stats'),
+    path('logout/', views.logout_user, name='logout'),
+    path('provision/', views.provision_users_view, name='provision-users'),
     path('', views.get_all_users, name='users-list'),
+    path('search/', views.search_users, name='users-search'),
     path('<int:user_id>/', views.get_user, name='user-detail'),
     path('update-staff-details/', views.update_staff_details, name='update-staff-details'),
     path('update-student-details/', views.update_student_details, name='update-student-details'),
     path('announcements/create/', views.create_announcement, name='create-announcement'),
     path('announcements/', views.get_announcements, name='announcements-list'),
+    path('announcements/search/', views.search_announcements_view, name='announcements-search'),
+    path('export/<str:resource>/', views.export_records, name='export-records'),
+    path('attendance/mark/', views.mark_attendance, name='mark-attendance'),
+    path('attendance/summary/<int:student_id>/', views.attendance_summary, name='attendance-summary'),
+    path('classes/', views.get_classes, name='classes-list'),
+    path('classes/<int:class_id>/enroll/', views.enroll_class_students, name='class-enroll'),
+    path('classes/<int:class_id>/unenroll/', views.unenroll_class_students, name='class-unenroll'),
+    path('classes/<int:class_id>/grade-stats/', views.class_grade_stats, name='class-grade-stats'),
+    path('grades/import/', views.import_grades_view, name='grades-import'),
 ]
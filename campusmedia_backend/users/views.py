@@ -1,9 +1,47 @@
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from django.db import IntegrityError
-from .models import User, Announcement
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.dateparse import parse_date
+from .models import User, Class, Announcement, AttendanceRollup
 from .serializers import UserSerializer, UserLoginSerializer, UserResponseSerializer
+from .pagination import InvalidCursor, approximate_count, get_page_size, keyset_page
+from .exports import EXPORT_FIELDS, ArchiveInProgress, csv_lines, export_querysets, iter_rows, ndjson_lines
+from .authentication import TokenPrincipal, get_token_key, issue_token, resolve_token, revoke_token
+from .throttling import get_client_ip, get_login_throttle
+from .filters import filter_users, parse_bool
+from .feed import get_announcement_feed
+from .search import search_announcements
+from .typeahead import search_users as typeahead_users
+from .attendance import AttendanceError, mark_class_attendance, parse_status
+from .academic import current_term
+from .analytics import get_class_grade_stats
+from .grade_import import GradeImportError, import_grades, read_grade_rows
+from .enrollment import enroll_students, unenroll_students
+from .provisioning import ProvisioningError, iter_roster_list, provision_users, read_roster
+from .dashboards import staff_dashboard, student_dashboard
+
+
+def _token_principal(request):
+    """The caller resolved from an access token, or None for unauthenticated (legacy) requests"""
+    return request.user if isinstance(request.user, TokenPrincipal) else None
+
+
+def _audience_role(request):
+    """
+    The role whose announcements the caller may see: the token's role if
+    authenticated, else ?role=. Raises ValueError for an unknown role.
+    """
+    principal = _token_principal(request)
+    role = principal.role if principal is not None else request.query_params.get('role')
+    if role and role not in dict(User.ROLE_CHOICES):
+        raise ValueError('Invalid role')
+    return role
 
 
 @api_view(['POST'])
@@ -53,14 +91,32 @@ def login_user(request):
     Login user
     POST /api/users/login/
     """
+    # Throttle before the user lookup and password hash, which is the expensive part
+    throttle = get_login_throttle()
+    account = str(request.data.get('email') or '').strip().lower()
+    client_ip = get_client_ip(request)
+    retry_after = throttle.check(account, client_ip)
+    if retry_after is not None:
+        response = Response({
+            'success': False,
+            'message': 'Too many failed login attempts. Please try again later.'
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(retry_after)
+        return response
+    
     serializer = UserLoginSerializer(data=request.data)
+    valid = serializer.is_valid()
+    throttle.record(account, client_ip, success=valid)
     
-    if serializer.is_valid():
+    if valid:
         user = serializer.validated_data['user']
+        token, expires_at = issue_token(user)
         response_serializer = UserResponseSerializer(user)
         return Response({
             'success': True,
             'message': 'Login successful',
+            'token': token,
+            'expires_at': expires_at,
             'user': response_serializer.data
         }, status=status.HTTP_200_OK)
     
@@ -71,17 +127,108 @@ def login_user(request):
     }, status=status.HTTP_401_UNAUTHORIZED)
 
 
+@api_view(['POST'])
+def logout_user(request):
+    """
+    Revoke the access token sent in the Authorization header
+    POST /api/users/logout/
+    """
+    if _token_principal(request) is None:
+        return Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    revoke_token(request.auth)
+    return Response({
+        'success': True,
+        'message': 'Logged out successfully'
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def login_throttle_stats(request):
+    """
+    Login throttle rejection counts for this worker process (Admin only)
+    GET /api/users/login/throttle-stats/
+    """
+    principal = _token_principal(request)
+    if principal is None or principal.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Only Admin can view throttle statistics'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response({
+        'success': True,
+        'stats': get_login_throttle().stats()
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 def get_all_users(request):
     """
-    Get all users (for testing/admin purposes)
-    GET /api/users/
+    Get users, one page at a time (for testing/admin purposes)
+    GET /api/users/?page_size=50&cursor=<next_cursor>&role=Student&is_active=true&include_count=true
     """
-    users = User.objects.all()
+    try:
+        users = filter_users(User.objects.all(), request.query_params)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        page, next_cursor = keyset_page(
+            users,
+            request.query_params.get('cursor'),
+            get_page_size(request),
+            salt='users.list',
+        )
+    except InvalidCursor:
+        return Response({
+            'success': False,
+            'message': 'Invalid cursor'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = UserResponseSerializer(page, many=True)
+    data = {
+        'success': True,
+        'page_count': len(page),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'users': serializer.data
+    }
+    # Opt-in: with filters the total is a COUNT(*) over every match
+    if parse_bool(request.query_params.get('include_count')):
+        data['count'] = approximate_count(users)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def search_users(request):
+    """
+    Typeahead search by name, email or register number
+    GET /api/users/search/?q=jo&role=Student&limit=10
+    """
+    query = request.query_params.get('q', '')
+    role = request.query_params.get('role')
+    if role and role not in dict(User.ROLE_CHOICES):
+        return Response({
+            'success': False,
+            'message': 'Invalid role'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+    except ValueError:
+        limit = 10
+    
+    users = typeahead_users(query, limit=limit, role=role)
     serializer = UserResponseSerializer(users, many=True)
     return Response({
         'success': True,
-        'count': users.count(),
+        'count': len(users),
         'users': serializer.data
     }, status=status.HTTP_200_OK)
 
@@ -116,6 +263,15 @@ def create_announcement(request):
     content = request.data.get('content')
     created_by_id = request.data.get('created_by_id')
     target_role = request.data.get('target_role', None)
+    principal = _token_principal(request)
+    
+    if principal is not None:
+        if created_by_id and str(created_by_id) != str(principal.id):
+            return Response({
+                'success': False,
+                'message': 'created_by_id does not match the authenticated user'
+            }, status=status.HTTP_403_FORBIDDEN)
+        created_by_id = principal.id
     
     if not title or not content or not created_by_id:
         return Response({
@@ -123,6 +279,33 @@ def create_announcement(request):
             'message': 'Title, content, and created_by_id are required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    if principal is not None:
+        # Authorized from the token alone, no User lookup needed
+        if principal.role not in ['Staff', 'Principal', 'Admin']:
+            return Response({
+                'success': False,
+                'message': 'Only Staff, Principal, or Admin can create announcements'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        announcement = Announcement.objects.create(
+            title=title,
+            content=content,
+            created_by_id=principal.id,
+            target_role=target_role
+        )
+        
+        return Response({
+            'success': True,
+            'message': 'Announcement created successfully',
+            'announcement': {
+                'id': announcement.id,
+                'title': announcement.title,
+                'content': announcement.content,
+                'created_by': principal.full_name,
+                'created_at': announcement.created_at
+            }
+        }, status=status.HTTP_201_CREATED)
+    
     try:
         user = User.objects.get(id=created_by_id)
         if user.role not in ['Staff', 'Principal', 'Admin']:
@@ -165,23 +348,89 @@ def create_announcement(request):
 @api_view(['GET'])
 def get_announcements(request):
     """
-    Get all announcements
-    GET /api/announcements/
+    Get announcements for the caller's role plus global ones, newest first
+    GET /api/announcements/?role=Student&page_size=20&cursor=<next_cursor>
+
+    The role comes from the access token when one is sent; otherwise from
+    ?role=, and with neither only global announcements are returned.
+    Pages are served from cache. Clients that send If-None-Match or
+    If-Modified-Since get a 304 when nothing changed, without a query.
     """
-    announcements = Announcement.objects.filter(is_active=True).select_related('created_by')
+    try:
+        role = _audience_role(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        feed = get_announcement_feed(
+            role,
+            request.query_params.get('cursor'),
+            get_page_size(request, default=20, maximum=100),
+        )
+    except InvalidCursor:
+        return Response({
+            'success': False,
+            'message': 'Invalid cursor'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    not_modified = get_conditional_response(request, etag=feed['etag'], last_modified=feed['last_modified'])
+    if not_modified is not None:
+        return not_modified
+    
+    response = Response(feed['data'], status=status.HTTP_200_OK)
+    response['ETag'] = feed['etag']
+    response['Last-Modified'] = http_date(feed['last_modified'])
+    patch_cache_control(response, no_cache=True, private=_token_principal(request) is not None)
+    return response
+
+
+@api_view(['GET'])
+def search_announcements_view(request):
+    """
+    Full-text search over announcement titles and content, best match first
+    GET /api/users/announcements/search/?q=exam&role=Student&page=1&page_size=20
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({
+            'success': False,
+            'message': 'Search query (q) is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        role = _audience_role(request)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = max(1, int(request.query_params.get('page', 1)))
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'Invalid page'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
+    results, has_more = search_announcements(query, role, page, get_page_size(request, default=20, maximum=50))
     data = [{
         'id': ann.id,
         'title': ann.title,
         'content': ann.content,
         'created_by': ann.created_by.get_full_name(),
         'target_role': ann.target_role,
-        'created_at': ann.created_at
-    } for ann in announcements]
+        'created_at': ann.created_at,
+        'score': score
+    } for ann, score in results]
     
     return Response({
         'success': True,
         'count': len(data),
+        'page': page,
+        'has_more': has_more,
         'announcements': data
     }, status=status.HTTP_200_OK)
 
@@ -198,6 +447,21 @@ def update_staff_details(request):
     assigned_classes = request.data.get('assigned_classes')
     experience_years = request.data.get('experience_years')
     
+    principal = _token_principal(request)
+    
+    if principal is not None:
+        if user_id and str(user_id) != str(principal.id):
+            return Response({
+                'success': False,
+                'message': 'Cannot update details of another user'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if principal.role not in ['Staff', 'Principal']:
+            return Response({
+                'success': False,
+                'message': 'Only Staff and Principal can update staff details'
+            }, status=status.HTTP_403_FORBIDDEN)
+        user_id = principal.id
+    
     if not user_id:
         return Response({
             'success': False,
@@ -272,6 +536,21 @@ def update_student_details(request):
     year = request.data.get('year')
     department = request.data.get('department')
     
+    principal = _token_principal(request)
+    
+    if principal is not None:
+        if user_id and str(user_id) != str(principal.id):
+            return Response({
+                'success': False,
+                'message': 'Cannot update details of another user'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if principal.role != 'Student':
+            return Response({
+                'success': False,
+                'message': 'Only Students can update student details'
+            }, status=status.HTTP_403_FORBIDDEN)
+        user_id = principal.id
+    
     if not user_id:
         return Response({
             'success': False,
@@ -327,3 +606,529 @@ def update_student_details(request):
             'success': False,
             'message': f'Error updating student details: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+def export_records(request, resource):
+    """
+    Stream users, attendance or grades as NDJSON (default) or CSV
+    GET /api/users/export/<users|attendance|grades>/?format=csv
+
+    Rows are written as they are read, so memory stays flat and the first
+    byte goes out as soon as the first chunk is fetched. This is a plain
+    Django view because DRF would treat ?format= as a renderer override.
+    Attendance and grades from archived academic years are included when
+    date_from/date_to reach into them.
+    """
+    key = get_token_key(request)
+    principal = resolve_token(key) if key else None
+    if principal is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role not in ['Principal', 'Admin']:
+        return JsonResponse({
+            'success': False,
+            'message': 'Only Principal or Admin can export records'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if resource not in EXPORT_FIELDS:
+        return JsonResponse({
+            'success': False,
+            'message': 'Unknown export resource'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return JsonResponse({
+            'success': False,
+            'message': 'Format must be ndjson or csv'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        querysets = export_querysets(resource, request.GET)
+    except ArchiveInProgress as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_409_CONFLICT)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    _, fields = EXPORT_FIELDS[resource]
+    rows = (row for queryset in querysets for row in iter_rows(queryset, fields))
+    if export_format == 'csv':
+        response = StreamingHttpResponse(csv_lines(rows, fields), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(ndjson_lines(rows, fields), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{resource}.{export_format}"'
+    return response
+
+
+@api_view(['POST'])
+def mark_attendance(request):
+    """
+    Mark attendance for a whole class in one request
+    POST /api/users/attendance/mark/
+    {"class_id": 3, "date": "2026-01-16", "default_status": "P", "statuses": {"12": "A", "15": "L"}}
+
+    Students missing from "statuses" get "default_status"; without a default
+    every enrolled student must be listed. Marking the same class and date
+    again overwrites the earlier statuses.
+    """
+    principal = _token_principal(request)
+    if principal is None:
+        return Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role not in ['Staff', 'Principal']:
+        return Response({
+            'success': False,
+            'message': 'Only Staff and Principal can mark attendance'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        class_id = int(request.data.get('class_id'))
+        # parse_date raises on well-formed but impossible dates such as 2026-02-30
+        date = parse_date(str(request.data.get('date') or ''))
+    except (TypeError, ValueError):
+        class_id, date = None, None
+    statuses = request.data.get('statuses') or {}
+    default_status = request.data.get('default_status')
+    
+    if not class_id or date is None or not isinstance(statuses, dict):
+        return Response({
+            'success': False,
+            'message': 'class_id, date (YYYY-MM-DD) and a statuses map are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if default_status is not None:
+        default_status = parse_status(default_status)
+        if default_status is None:
+            return Response({
+                'success': False,
+                'message': 'Invalid default_status'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    class_obj = Class.objects.filter(id=class_id).only('id', 'teacher_id').first()
+    if class_obj is None:
+        return Response({
+            'success': False,
+            'message': 'Class not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    if principal.role == 'Staff' and class_obj.teacher_id != principal.id:
+        return Response({
+            'success': False,
+            'message': 'Staff can only mark attendance for their own classes'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        summary = mark_class_attendance(
+            class_obj, date, statuses, principal.id,
+            default_status=default_status,
+            remarks=request.data.get('remarks'),
+        )
+    except AttendanceError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': 'Attendance marked successfully',
+        'class_id': class_obj.id,
+        'date': date,
+        'marked': sum(summary.values()),
+        'summary': dict(summary)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def attendance_summary(request, student_id):
+    """
+    Attendance counts and percentage per class for one student and term
+    GET /api/users/attendance/summary/<student_id>/?term=2025-26/T1
+
+    Read straight from the attendance rollups; defaults to the current term.
+    """
+    principal = _token_principal(request)
+    if principal is None:
+        return Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role in ['Student', 'User'] and principal.id != student_id:
+        return Response({
+            'success': False,
+            'message': 'Students can only view their own attendance'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    term = request.query_params.get('term') or current_term()
+    rollups = (
+        AttendanceRollup.objects
+        .filter(student_id=student_id, term=term)
+        .select_related('class_attended')
+        .order_by('class_attended__class_name')
+    )
+    classes = []
+    totals = AttendanceRollup(student_id=student_id, term=term)
+    for rollup in rollups:
+        classes.append({
+            'class_id': rollup.class_attended_id,
+            'class_name': rollup.class_attended.class_name,
+            'subject': rollup.class_attended.subject,
+            'present': rollup.present,
+            'absent': rollup.absent,
+            'late': rollup.late,
+            'excused': rollup.excused,
+            'total': rollup.total,
+            'attendance_percentage': rollup.attendance_percentage
+        })
+        totals.present += rollup.present
+        totals.absent += rollup.absent
+        totals.late += rollup.late
+        totals.excused += rollup.excused
+    
+    return Response({
+        'success': True,
+        'student_id': student_id,
+        'term': term,
+        'overall_percentage': totals.attendance_percentage,
+        'classes': classes
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def class_grade_stats(request, class_id):
+    """
+    Grade statistics for a class: mean, median, standard deviation,
+    percentiles and letter histogram, overall and per assignment
+    GET /api/users/classes/<class_id>/grade-stats/?assignment=Midterm
+    """
+    principal = _token_principal(request)
+    if principal is None or principal.role not in ['Staff', 'Principal', 'Admin']:
+        return Response({
+            'success': False,
+            'message': 'Only Staff, Principal, or Admin can view class grade statistics'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    class_obj = Class.objects.filter(id=class_id).only('id', 'class_name', 'subject').first()
+    if class_obj is None:
+        return Response({
+            'success': False,
+            'message': 'Class not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    stats = get_class_grade_stats(class_id)
+    data = {
+        'success': True,
+        'class_id': class_obj.id,
+        'class_name': class_obj.class_name,
+        'subject': class_obj.subject,
+    }
+    assignment = request.query_params.get('assignment')
+    if assignment:
+        if assignment not in stats['assignments']:
+            return Response({
+                'success': False,
+                'message': 'No grades for this assignment'
+            }, status=status.HTTP_404_NOT_FOUND)
+        data['assignment_name'] = assignment
+        data['stats'] = stats['assignments'][assignment]
+    else:
+        data['overall'] = stats['overall']
+        data['assignments'] = [
+            dict(assignment_stats, assignment_name=name)
+            for name, assignment_stats in stats['assignments'].items()
+        ]
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+def import_grades_view(request):
+    """
+    Bulk create/update grades from a CSV or XLSX file
+    POST /api/users/grades/import/  (multipart, field "file")
+
+    Columns: student_id, class_id, assignment_name, score, and optionally
+    remarks. A grade that already exists for the same student, class and
+    assignment is overwritten. Invalid rows are skipped and reported.
+    """
+    principal = _token_principal(request)
+    if principal is None:
+        return Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role not in ['Staff', 'Principal']:
+        return Response({
+            'success': False,
+            'message': 'Only Staff and Principal can import grades'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({
+            'success': False,
+            'message': 'Upload a CSV or XLSX file in the "file" field'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        report = import_grades(
+            read_grade_rows(upload, upload.name),
+            graded_by_id=principal.id,
+            # Staff may only grade their own classes
+            teacher_id=principal.id if principal.role == 'Staff' else None,
+        )
+    except GradeImportError as e:
+        return Response({
+            'success': False,
+            'message': str(e),
+            # Rows before the unreadable part of the file are already saved
+            'created': e.created,
+            'updated': e.updated
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': 'Grades imported',
+        **report
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def get_classes(request):
+    """
+    List classes with their enrolled student counts
+    GET /api/users/classes/?teacher_id=5&include_inactive=true
+    """
+    classes = Class.objects.select_related('teacher')
+    teacher_id = request.query_params.get('teacher_id')
+    if teacher_id:
+        if not teacher_id.isdigit():
+            return Response({
+                'success': False,
+                'message': 'Invalid teacher_id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        classes = classes.filter(teacher_id=teacher_id)
+    if not parse_bool(request.query_params.get('include_inactive')):
+        classes = classes.filter(is_active=True)
+    
+    # student_count is kept in step with enrollments, so no per-class COUNT
+    data = [{
+        'id': class_obj.id,
+        'class_name': class_obj.class_name,
+        'subject': class_obj.subject,
+        'schedule': class_obj.schedule,
+        'teacher_id': class_obj.teacher_id,
+        'teacher_name': class_obj.teacher.get_full_name(),
+        'student_count': class_obj.student_count,
+        'is_active': class_obj.is_active
+    } for class_obj in classes]
+    
+    return Response({
+        'success': True,
+        'count': len(data),
+        'classes': data
+    }, status=status.HTTP_200_OK)
+
+
+def _enrollment_request(request, class_id):
+    """
+    Shared checks for enroll/unenroll. Returns (class_obj, student_ids, None)
+    or (None, None, error_response).
+    """
+    principal = _token_principal(request)
+    if principal is None:
+        return None, None, Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role not in ['Staff', 'Principal', 'Admin']:
+        return None, None, Response({
+            'success': False,
+            'message': 'Only Staff, Principal, or Admin can manage enrollments'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    student_ids = request.data.get('student_ids')
+    if not isinstance(student_ids, list) or not student_ids or not all(
+            isinstance(student_id, int) and not isinstance(student_id, bool) for student_id in student_ids):
+        return None, None, Response({
+            'success': False,
+            'message': 'student_ids must be a non-empty list of user ids'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    class_obj = Class.objects.filter(id=class_id).only('id', 'teacher_id').first()
+    if class_obj is None:
+        return None, None, Response({
+            'success': False,
+            'message': 'Class not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    if principal.role == 'Staff' and class_obj.teacher_id != principal.id:
+        return None, None, Response({
+            'success': False,
+            'message': 'Staff can only manage enrollments for their own classes'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return class_obj, set(student_ids), None
+
+
+@api_view(['POST'])
+def enroll_class_students(request, class_id):
+    """
+    Enroll students in a class
+    POST /api/users/classes/<class_id>/enroll/
+    {"student_ids": [12, 15, 18]}
+    """
+    class_obj, student_ids, error = _enrollment_request(request, class_id)
+    if error:
+        return error
+    
+    students = set(User.objects.filter(id__in=student_ids, role='Student').values_list('id', flat=True))
+    unknown = student_ids - students
+    if unknown:
+        return Response({
+            'success': False,
+            'message': f'Not student accounts: {sorted(unknown)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    enrolled = enroll_students(class_obj, student_ids)
+    return Response({
+        'success': True,
+        'message': 'Students enrolled',
+        'class_id': class_obj.id,
+        'enrolled': len(enrolled),
+        'already_enrolled': len(student_ids) - len(enrolled),
+        'student_count': Class.objects.values_list('student_count', flat=True).get(pk=class_obj.pk)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def unenroll_class_students(request, class_id):
+    """
+    Remove students from a class
+    POST /api/users/classes/<class_id>/unenroll/
+    {"student_ids": [12, 15]}
+    """
+    class_obj, student_ids, error = _enrollment_request(request, class_id)
+    if error:
+        return error
+    
+    removed = unenroll_students(class_obj, student_ids)
+    return Response({
+        'success': True,
+        'message': 'Students unenrolled',
+        'class_id': class_obj.id,
+        'unenrolled': removed,
+        'student_count': Class.objects.values_list('student_count', flat=True).get(pk=class_obj.pk)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@parser_classes([JSONParser, MultiPartParser])
+def provision_users_view(request):
+    """
+    Create many user accounts at once (Admin only)
+    POST /api/users/provision/
+    {"users": [{"first_name": ..., "email": ..., "password": ...}, ...]}
+    or multipart with a CSV/JSON roster in the "file" field; ?dry_run=true
+    only validates.
+    """
+    principal = _token_principal(request)
+    if principal is None or principal.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Only Admin can provision users'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    try:
+        if upload is not None:
+            rows = read_roster(upload, upload.name)
+        else:
+            rows = iter_roster_list(request.data.get('users') if hasattr(request.data, 'get') else request.data)
+        report = provision_users(rows, dry_run=parse_bool(request.query_params.get('dry_run')))
+    except ProvisioningError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': 'Users provisioned',
+        **report
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def student_dashboard_view(request, student_id):
+    """
+    Everything the student home page needs in one call: profile, classes
+    with teachers, grade averages and attendance, recent grades and the
+    latest announcements
+    GET /api/students/<student_id>/dashboard/?term=2025-26/T1
+    """
+    principal = _token_principal(request)
+    if principal is None:
+        return Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role in ['Student', 'User'] and principal.id != student_id:
+        return Response({
+            'success': False,
+            'message': 'Students can only view their own dashboard'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    student = User.objects.filter(id=student_id, role='Student').first()
+    if student is None:
+        return Response({
+            'success': False,
+            'message': 'Student not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': True,
+        **student_dashboard(student, term=request.query_params.get('term'))
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def staff_dashboard_view(request, staff_id):
+    """
+    Staff home page: classes taught with enrollment counts, today's
+    attendance status and average grades, plus the latest announcements
+    GET /api/staff/<staff_id>/dashboard/
+
+    Cached for a minute per teacher.
+    """
+    principal = _token_principal(request)
+    if principal is None:
+        return Response({
+            'success': False,
+            'message': 'Authentication token required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    if principal.role not in ['Staff', 'Principal', 'Admin'] or (
+            principal.role == 'Staff' and principal.id != staff_id):
+        return Response({
+            'success': False,
+            'message': 'Staff can only view their own dashboard'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    dashboard = staff_dashboard(staff_id)
+    if dashboard is None:
+        return Response({
+            'success': False,
+            'message': 'Staff member not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': True,
+        **dashboard
+    }, status=status.HTTP_200_OK)